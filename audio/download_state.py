@@ -0,0 +1,116 @@
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+STATE_FIELDS = ['video_id', 'status', 'attempts', 'source', 'last_error']
+
+class DownloadState:
+    """
+    未完成歌曲的下载状态
+
+    记录每首歌曲正在下载的视频ID、已尝试次数、最近一次错误，以及已下载但尚未转码的
+    原始文件。程序中断后重新运行时，未用完的重试次数和已下载的原始文件继续使用，
+    歌曲转码完成后从状态中删除。
+    """
+
+    def __init__(self, db_path: Path):
+        """
+        :param db_path: 状态数据库路径
+        """
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS downloads ("
+                "song TEXT PRIMARY KEY, video_id TEXT, status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+                "source TEXT, last_error TEXT, updated_at REAL NOT NULL)"
+            )
+            rows = self._conn.execute(f"SELECT song, {', '.join(STATE_FIELDS)} FROM downloads").fetchall()
+        self._songs: Dict[str, Dict] = {row[0]: dict(zip(STATE_FIELDS, row[1:])) for row in rows}
+
+    def _save(self, song_name: str, **fields):
+        """更新歌曲的状态（调用方需持有锁）"""
+        state = self._songs.setdefault(
+            song_name, {'video_id': None, 'status': 'downloading', 'attempts': 0, 'source': None, 'last_error': None})
+        state.update(fields)
+        with self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO downloads (song, {', '.join(STATE_FIELDS)}, updated_at) "
+                f"VALUES (?, {', '.join('?' * len(STATE_FIELDS))}, ?)",
+                (song_name, *(state[field] for field in STATE_FIELDS), time.time())
+            )
+
+    def get(self, song_name: str) -> Optional[Dict]:
+        """
+        查询歌曲的下载状态
+        :param song_name: 歌曲名称
+        :return: 下载状态，没有时为None
+        """
+        with self._lock:
+            state = self._songs.get(song_name)
+            return dict(state) if state is not None else None
+
+    def start_attempt(self, song_name: str, video_id: str) -> int:
+        """
+        记录开始一次下载尝试，换了视频时重新计数
+        :param song_name: 歌曲名称
+        :param video_id: 视频ID
+        :return: 包括本次在内的尝试次数
+        """
+        with self._lock:
+            state = self._songs.get(song_name)
+            attempts = state['attempts'] + 1 if state is not None and state['video_id'] == video_id else 1
+            self._save(song_name, video_id=video_id, status='downloading', attempts=attempts, source=None)
+            return attempts
+
+    def record_error(self, song_name: str, error: str):
+        with self._lock:
+            self._save(song_name, last_error=error)
+
+    def fetched(self, song_name: str, source: Path):
+        """
+        记录原始文件已下载完成，等待转码
+        :param song_name: 歌曲名称
+        :param source: 原始文件路径
+        """
+        with self._lock:
+            self._save(song_name, status='fetched', source=str(source))
+
+    def failed(self, song_name: str):
+        """
+        记录歌曲本次运行下载失败，下次运行时重新计数
+        :param song_name: 歌曲名称
+        """
+        with self._lock:
+            self._save(song_name, status='failed', attempts=0, source=None)
+
+    def clear(self, song_name: str):
+        """
+        歌曲下载完成，删除其状态
+        :param song_name: 歌曲名称
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM downloads WHERE song = ?", (song_name,))
+            self._songs.pop(song_name, None)
+
+    def unfinished(self) -> List[str]:
+        """
+        上次运行中断时正在下载或等待转码的歌曲
+        :return: 歌曲名称列表
+        """
+        with self._lock:
+            return [song for song, state in self._songs.items() if state['status'] in ('downloading', 'fetched')]
+
+    def failures(self) -> Dict[str, Optional[str]]:
+        """
+        下载失败的歌曲及其最近一次错误
+        :return: 歌曲名称到错误信息的映射
+        """
+        with self._lock:
+            return {song: state['last_error'] for song, state in self._songs.items() if state['status'] == 'failed'}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
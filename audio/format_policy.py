@@ -0,0 +1,74 @@
+from typing import List, Optional, Tuple
+
+# 格式策略：
+#   auto   按需转码：无损音源（ALAC、PCM等）转为 FLAC，有损音源只换封装，不重新编码
+#   remux  只换封装：所有音源都按编码放入对应的音频容器，不重新编码
+#   keep   保留原始文件，不调用 FFmpeg
+#   flac   全部转为 FLAC
+FORMAT_POLICIES = ['auto', 'remux', 'keep', 'flac']
+
+# 编码对应的音频容器扩展名和 FFmpeg 封装格式
+CODEC_CONTAINERS = {
+    'opus': ('.opus', 'opus'),
+    'vorbis': ('.ogg', 'ogg'),
+    'aac': ('.m4a', 'ipod'),
+    'mp3': ('.mp3', 'mp3'),
+    'flac': ('.flac', 'flac'),
+    'alac': ('.m4a', 'ipod'),
+    'pcm': ('.wav', 'wav'),
+}
+
+LOSSLESS_CODECS = {'flac', 'alac', 'pcm'}
+
+def normalize_codec(codec: Optional[str]) -> Optional[str]:
+    """
+    把 yt-dlp 或 ffprobe 给出的编码名称统一为 CODEC_CONTAINERS 中的名称
+    :param codec: 编码名称，例如 mp4a.40.2、opus、pcm_s16le
+    :return: 统一后的名称，无法识别时为None
+    """
+    if not codec or codec == 'none':
+        return None
+    codec = codec.lower()
+    if codec.startswith('mp4a') or codec == 'aac':
+        return 'aac'
+    if codec.startswith('pcm_'):
+        return 'pcm'
+    if codec in ('mp3', 'mp3float'):
+        return 'mp3'
+    return codec if codec in CODEC_CONTAINERS else None
+
+def plan_conversion(policy: str, codec: Optional[str], source_ext: str) -> Tuple[str, str, Optional[str]]:
+    """
+    根据格式策略和音源编码决定如何处理下载的文件
+    :param policy: 格式策略，见 FORMAT_POLICIES
+    :param codec: 统一后的音源编码，未知时为None
+    :param source_ext: 原始文件扩展名
+    :return: (处理方式, 目标扩展名, FFmpeg 封装格式)，处理方式为 'move'（直接移动）、
+             'remux'（只换封装）或 'transcode'（转为 FLAC）
+    """
+    if policy not in FORMAT_POLICIES:
+        raise ValueError(f"不支持的格式策略: {policy}，可选: {', '.join(FORMAT_POLICIES)}")
+    source_ext = source_ext.lower()
+    if policy == 'keep':
+        return 'move', source_ext, None
+    if policy == 'flac' or (policy == 'auto' and codec in LOSSLESS_CODECS and codec != 'flac'):
+        if codec == 'flac':
+            return ('move', '.flac', None) if source_ext == '.flac' else ('remux', '.flac', 'flac')
+        return 'transcode', '.flac', 'flac'
+    if codec is None:
+        # 无法确定编码时不换封装，保留原始文件
+        return 'move', source_ext, None
+    ext, muxer = CODEC_CONTAINERS[codec]
+    if source_ext == ext:
+        return 'move', ext, None
+    return 'remux', ext, muxer
+
+def ffmpeg_args(action: str, muxer: str) -> List[str]:
+    """
+    生成处理音频流的 FFmpeg 参数（不含输入输出文件）
+    :param action: 'remux' 或 'transcode'
+    :param muxer: FFmpeg 封装格式
+    :return: 参数列表
+    """
+    codec = ['-c:a', 'copy'] if action == 'remux' else ['-c:a', 'flac']
+    return ['-vn', '-map', '0:a:0', *codec, '-f', muxer]
@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import subprocess
+from pathlib import Path
+from typing import Dict, Optional
+
+# 视为已下载歌曲的文件扩展名
+AUDIO_EXTENSIONS = ['.flac', '.mp3', '.m4a', '.opus', '.ogg', '.wav', '.webm']
+
+MANIFEST_FIELDS = ['source_id', 'path', 'size', 'duration', 'codec', 'checksum']
+
+def file_checksum(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """
+    计算文件的 SHA-256 校验和
+    :param path: 文件路径
+    :param chunk_size: 每次读取的字节数
+    :return: 十六进制校验和
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def probe_audio(ffprobe: str, path: Path) -> Optional[Dict]:
+    """
+    用 ffprobe 读取音频文件的时长和编码
+    :param ffprobe: ffprobe 可执行文件路径
+    :param path: 文件路径
+    :return: 包含 duration 和 codec 的字典，文件无法读取时为None
+    """
+    result = subprocess.run(
+        [ffprobe, '-v', 'error', '-select_streams', 'a:0', '-show_entries', 'format=duration:stream=codec_name',
+         '-of', 'json', str(path)],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None
+    try:
+        info = json.loads(result.stdout)
+        streams = info.get('streams') or []
+        duration = float(info['format']['duration'])
+    except (ValueError, KeyError, TypeError):
+        return None
+    if not streams:
+        return None
+    return {'duration': duration, 'codec': streams[0].get('codec_name')}
+
+class LibraryManifest:
+    """
+    已下载歌曲的清单
+
+    记录每首歌曲的来源视频ID、文件路径、大小、时长、编码和校验和。清单和下载目录中的
+    文件列表在创建时一次性读入内存，之后判断歌曲是否已完整下载只需查询内存，
+    文件大小与清单不一致的歌曲视为不完整。
+    """
+
+    def __init__(self, download_dir: Path, db_path: Optional[Path] = None):
+        """
+        :param download_dir: 下载目录，清单中的路径相对于该目录
+        :param db_path: 清单数据库路径，默认为下载目录下的 .manifest.db
+        """
+        self.download_dir = Path(download_dir)
+        self._conn = sqlite3.connect(str(db_path or self.download_dir / ".manifest.db"), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tracks ("
+                "song TEXT PRIMARY KEY, source_id TEXT, path TEXT NOT NULL, size INTEGER NOT NULL, "
+                "duration REAL, codec TEXT, checksum TEXT NOT NULL, added_at REAL NOT NULL)"
+            )
+            rows = self._conn.execute(f"SELECT song, {', '.join(MANIFEST_FIELDS)} FROM tracks").fetchall()
+        self._tracks: Dict[str, Dict] = {row[0]: dict(zip(MANIFEST_FIELDS, row[1:])) for row in rows}
+        self._files: Dict[str, int] = {}
+        self.rescan()
+
+    def rescan(self):
+        """重新读取下载目录中的文件列表"""
+        files = {}
+        with os.scandir(self.download_dir) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    files[entry.name] = entry.stat().st_size
+        with self._lock:
+            self._files = files
+
+    def get(self, song_name: str) -> Optional[Dict]:
+        """
+        查询歌曲的清单记录
+        :param song_name: 歌曲名称
+        :return: 清单记录，没有时为None
+        """
+        with self._lock:
+            track = self._tracks.get(song_name)
+            return dict(track) if track is not None else None
+
+    def file_size(self, name: str) -> Optional[int]:
+        """
+        查询下载目录中文件的大小
+        :param name: 文件名
+        :return: 文件大小，文件不存在时为None
+        """
+        with self._lock:
+            return self._files.get(name)
+
+    def is_complete(self, song_name: str) -> bool:
+        """
+        判断歌曲是否已完整下载：清单中有记录，且文件存在、大小与记录一致
+        :param song_name: 歌曲名称
+        :return: 是否已完整下载
+        """
+        with self._lock:
+            track = self._tracks.get(song_name)
+            return track is not None and self._files.get(track['path']) == track['size']
+
+    def verify(self, song_name: str) -> bool:
+        """
+        重新计算文件的校验和并与清单比较
+        :param song_name: 歌曲名称
+        :return: 校验和是否一致
+        """
+        track = self.get(song_name)
+        if track is None:
+            return False
+        path = self.download_dir / track['path']
+        try:
+            return file_checksum(path) == track['checksum']
+        except OSError:
+            return False
+
+    def record(self, song_name: str, path: Path, source_id: Optional[str] = None,
+               duration: Optional[float] = None, codec: Optional[str] = None) -> Dict:
+        """
+        把已下载的文件加入清单
+        :param song_name: 歌曲名称
+        :param path: 文件路径，必须位于下载目录中
+        :param source_id: 来源视频ID
+        :param duration: 时长（秒）
+        :param codec: 音频编码
+        :return: 清单记录
+        """
+        path = Path(path)
+        track = {
+            'source_id': source_id,
+            'path': path.name,
+            'size': path.stat().st_size,
+            'duration': duration,
+            'codec': codec,
+            'checksum': file_checksum(path),
+        }
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO tracks (song, {', '.join(MANIFEST_FIELDS)}, added_at) "
+                f"VALUES (?, {', '.join('?' * len(MANIFEST_FIELDS))}, ?)",
+                (song_name, *(track[field] for field in MANIFEST_FIELDS), time.time())
+            )
+            self._tracks[song_name] = track
+            self._files[track['path']] = track['size']
+        return track
+
+    def remove(self, song_name: str):
+        """
+        从清单中删除歌曲
+        :param song_name: 歌曲名称
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM tracks WHERE song = ?", (song_name,))
+            self._tracks.pop(song_name, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._tracks)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
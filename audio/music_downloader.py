@@ -1,87 +1,638 @@
 import os
 import sys
 import time
+import shutil
+import argparse
+import threading
+import glob
+import subprocess
 from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor
 import yt_dlp
-from typing import Optional
+from typing import Dict, List, Optional, Set, Tuple
 import re
+from song_index import SongIndex
+from manifest import AUDIO_EXTENSIONS, LibraryManifest, probe_audio
+from download_state import DownloadState
+from format_policy import FORMAT_POLICIES, ffmpeg_args, normalize_codec, plan_conversion
+
+# 默认下载目录
+DEFAULT_DOWNLOAD_DIR = Path(__file__).parent / "download"
+
+# 分块下载时每个Range请求的大小，中断后从最后一个完整的块继续
+HTTP_CHUNK_SIZE = 10 * 1024 * 1024
 
 def clean_filename(filename: str) -> str:
     """清理文件名，移除非法字符"""
     return re.sub(r'[<>:"/\\|?*]', '', filename)
 
-def is_file_exists(download_dir: Path, song_name: str) -> bool:
-    """检查文件是否已存在"""
-    clean_name = clean_filename(song_name)
-    for ext in ['.flac', '.mp3', '.m4a']:
-        if (download_dir / f"{clean_name}{ext}").exists():
+class BatchProgress:
+    """
+    汇总所有下载和转码线程的进度，在同一行中刷新显示
+    """
+
+    def __init__(self, total: int, interval: float = 0.5):
+        """
+        :param total: 歌曲总数
+        :param interval: 进度行的最短刷新间隔（秒）
+        """
+        self.total = total
+        self.interval = interval
+        self.succeeded = 0
+        self.skipped = 0
+        self.failed = 0
+        self._resolving: Set[str] = set()
+        self._downloading: Dict[str, float] = {}
+        self._received: Dict[str, Optional[int]] = {}
+        self._converting: Set[str] = set()
+        self._bytes = 0
+        self._start = time.monotonic()
+        self._last_render = 0.0
+        self._line_width = 0
+        self._tty = sys.stdout.isatty()
+        self._lock = threading.Lock()
+
+    def _render(self, force: bool = False):
+        """刷新进度行（调用方需持有锁）"""
+        now = time.monotonic()
+        if not self._tty or (not force and now - self._last_render < self.interval):
+            return
+        self._last_render = now
+        finished = self.succeeded + self.skipped + self.failed
+        speed = self._bytes / max(now - self._start, 1e-6) / 1024 / 1024
+        line = (f"[{finished}/{self.total}] 成功 {self.succeeded} 跳过 {self.skipped} 失败 {self.failed}"
+                f" | 解析中 {len(self._resolving)} 下载中 {len(self._downloading)} 转码中 {len(self._converting)} | {speed:.2f} MB/s")
+        if self._downloading:
+            line += " | " + " ".join(f"{fraction:.0%}" for fraction in list(self._downloading.values())[:8])
+        padding = max(0, self._line_width - len(line))
+        self._line_width = len(line)
+        print(f"\r{line}{' ' * padding}", end='', flush=True)
+
+    def _clear(self):
+        """清除进度行（调用方需持有锁）"""
+        if self._tty and self._line_width:
+            print(f"\r{' ' * self._line_width}\r", end='')
+            self._line_width = 0
+
+    def log(self, message: str):
+        """在进度行上方输出一条消息"""
+        with self._lock:
+            self._clear()
+            print(message)
+            self._render(force=True)
+
+    def start_resolve(self, song: str):
+        with self._lock:
+            self._resolving.add(song)
+            self._render()
+
+    def finish_resolve(self, song: str):
+        with self._lock:
+            self._resolving.discard(song)
+            self._render()
+
+    def start_download(self, song: str):
+        with self._lock:
+            self._downloading[song] = 0.0
+            self._received[song] = None
+            self._render()
+
+    def update_download(self, song: str, downloaded: int, total: Optional[int]):
+        """
+        更新歌曲的下载进度
+        :param song: 歌曲名称
+        :param downloaded: 当前文件已下载的字节数
+        :param total: 当前文件的总字节数，未知时为None
+        """
+        with self._lock:
+            if song not in self._downloading:
+                return
+            # 续传时第一次回调的字节数包括之前已下载的部分，不计入速度
+            received = self._received.get(song)
+            if received is not None:
+                self._bytes += max(0, downloaded - received)
+            self._received[song] = downloaded
+            if total:
+                self._downloading[song] = min(1.0, downloaded / total)
+            self._render()
+
+    def finish_download(self, song: str):
+        with self._lock:
+            self._downloading.pop(song, None)
+            self._received.pop(song, None)
+            self._render()
+
+    def start_convert(self, song: str):
+        with self._lock:
+            self._converting.add(song)
+            self._render()
+
+    def finish_convert(self, song: str):
+        with self._lock:
+            self._converting.discard(song)
+            self._render()
+
+    def finish(self, status: str):
+        """
+        记录一首歌曲处理结束
+        :param status: 'success'、'skipped' 或 'failed'
+        """
+        with self._lock:
+            if status == 'success':
+                self.succeeded += 1
+            elif status == 'skipped':
+                self.skipped += 1
+            else:
+                self.failed += 1
+            self._render(force=True)
+
+    def close(self):
+        with self._lock:
+            self._clear()
+
+class MusicDownloader:
+    """
+    音乐下载器
+
+    下载分为两个阶段：先搜索每首歌曲，确定视频ID和音频格式并保存到本地索引；再按视频ID
+    下载。索引中未过期的歌曲不再搜索，重试也只重新下载。每个线程复用自己的 YoutubeDL
+    实例。下载得到的原始音频按格式策略处理：直接保留、只换封装，或转为 FLAC；只有真正需要
+    重新编码的文件才交给独立的转码线程池，由 FFmpeg 子进程完成。批量下载时搜索、网络传输
+    和转码同时进行，各线程的进度汇总到同一个进度行中。
+
+    下载完成的歌曲记录在清单中，包括文件大小、时长、编码和校验和，是否需要下载由清单判断；
+    文件大小与清单不符、无法读取或时长不完整的歌曲会重新下载。
+
+    原始音频分块下载到临时目录的 .part 文件中，失败重试和程序重新运行时用Range请求从
+    中断处继续。每首歌曲的尝试次数和已下载未转码的原始文件保存在下载状态中，
+    重新运行时优先处理上次未完成的歌曲。
+    """
+
+    def __init__(self, download_dir: Path = DEFAULT_DOWNLOAD_DIR, max_retries: int = 3,
+                 retry_delay: float = 5.0, search_interval: float = 2.0, index_ttl: float = 7 * 24 * 3600,
+                 verify: bool = False, format_policy: str = 'auto'):
+        """
+        :param download_dir: 下载目录
+        :param max_retries: 每首歌曲搜索和下载的最大尝试次数
+        :param retry_delay: 两次尝试之间的等待时间（秒）
+        :param search_interval: 所有线程合计两次搜索之间的最短间隔（秒），避免请求过于频繁
+        :param index_ttl: 索引中搜索结果的有效期（秒），0表示重新搜索所有歌曲
+        :param verify: 跳过已下载的歌曲前重新计算校验和，而不只比较文件大小
+        :param format_policy: 格式策略，见 format_policy.FORMAT_POLICIES
+        """
+        if format_policy not in FORMAT_POLICIES:
+            raise ValueError(f"不支持的格式策略: {format_policy}，可选: {', '.join(FORMAT_POLICIES)}")
+        self.download_dir = Path(download_dir)
+        self.temp_dir = self.download_dir / ".tmp"
+        self.download_dir.mkdir(parents=True, exist_ok=True)
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.search_interval = search_interval
+        self.index = SongIndex(self.download_dir / ".song_index.db", index_ttl)
+        self.index_hits = 0
+        self.manifest = LibraryManifest(self.download_dir)
+        self.verify = verify
+        self.state = DownloadState(self.download_dir / ".download_state.db")
+        self.format_policy = format_policy
+        self.actions = {'move': 0, 'remux': 0, 'transcode': 0}
+        self.ffmpeg = shutil.which('ffmpeg')
+        self.ffprobe = shutil.which('ffprobe')
+        self.progress = BatchProgress(1)
+        self._local = threading.local()
+        self._instances: List[yt_dlp.YoutubeDL] = []
+        self._lock = threading.Lock()
+        self._next_search = 0.0
+
+    def _get_ydl(self, format_spec: str = 'bestaudio/best') -> yt_dlp.YoutubeDL:
+        """
+        获取当前线程使用指定格式的 YoutubeDL 实例，同一线程的多次请求复用连接和提取器
+        :param format_spec: yt-dlp 格式选择表达式
+        :return: YoutubeDL 实例
+        """
+        instances = getattr(self._local, 'ydls', None)
+        if instances is None:
+            instances = self._local.ydls = {}
+        ydl = instances.get(format_spec)
+        if ydl is None:
+            ydl_opts = {
+                'format': format_spec,
+                # 原始音频按视频ID保存到临时目录，转码后再以歌曲名称命名
+                'outtmpl': str(self.temp_dir / '%(id)s.%(ext)s'),
+                'quiet': True,
+                'no_warnings': True,
+                'noprogress': True,
+                'progress_hooks': [self._progress_hook],
+                'extract_flat': False,
+                'noplaylist': True,
+                # 保留 .part 文件，重试时从中断处继续下载
+                'continuedl': True,
+                'nopart': False,
+                'http_chunk_size': HTTP_CHUNK_SIZE,
+            }
+            ydl = instances[format_spec] = yt_dlp.YoutubeDL(ydl_opts)
+            with self._lock:
+                self._instances.append(ydl)
+        return ydl
+
+    def _progress_hook(self, d: dict):
+        """yt-dlp 进度回调，在下载线程中执行"""
+        song = getattr(self._local, 'song', None)
+        if song is not None and d['status'] == 'downloading':
+            self.progress.update_download(
+                song, d.get('downloaded_bytes') or 0, d.get('total_bytes') or d.get('total_bytes_estimate'))
+
+    def _wait_search_slot(self):
+        """限制所有线程合计的搜索频率"""
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_search - now
+            self._next_search = max(now, self._next_search) + self.search_interval
+        if wait > 0:
+            time.sleep(wait)
+
+    @staticmethod
+    def _downloaded_path(ydl: yt_dlp.YoutubeDL, info: dict) -> Path:
+        """获取 yt-dlp 实际保存的文件路径"""
+        downloads = info.get('requested_downloads') or []
+        if downloads and downloads[0].get('filepath'):
+            return Path(downloads[0]['filepath'])
+        return Path(ydl.prepare_filename(info))
+
+    def resolve(self, song_name: str) -> Optional[Dict]:
+        """
+        搜索歌曲，确定要下载的视频ID和音频格式，结果保存到索引
+        :param song_name: 歌曲名称
+        :return: 搜索结果，失败时为None
+        """
+        resolved = self.index.get(song_name)
+        if resolved is not None:
+            with self._lock:
+                self.index_hits += 1
+            return resolved
+
+        # 优化搜索关键词，添加"原版"或"官方"等关键词
+        search_query = f"{song_name} 原版 官方"
+
+        for attempt in range(self.max_retries):
+            self._wait_search_slot()
+            self.progress.start_resolve(song_name)
+            try:
+                info = self._get_ydl().extract_info(f"ytsearch:{search_query}", download=False)
+                entries = [entry for entry in (info or {}).get('entries') or [] if entry]
+                if not entries:
+                    raise yt_dlp.utils.DownloadError("没有找到搜索结果")
+                entry = entries[0]
+                resolved = {
+                    'video_id': entry['id'],
+                    'url': entry.get('webpage_url') or entry.get('original_url'),
+                    'title': entry.get('title'),
+                    'duration': entry.get('duration'),
+                    'format_id': entry.get('format_id'),
+                    'ext': entry.get('ext'),
+                    'acodec': entry.get('acodec'),
+                    'abr': entry.get('abr'),
+                }
+                self.index.put(song_name, resolved)
+                return resolved
+            except Exception as e:
+                self.state.record_error(song_name, str(e))
+                self.progress.log(f"搜索《{song_name}》时出现错误 (尝试 {attempt + 1}/{self.max_retries}): {str(e)}")
+            finally:
+                self.progress.finish_resolve(song_name)
+            if attempt < self.max_retries - 1:
+                time.sleep(self.retry_delay)
+
+        self.state.failed(song_name)
+        self.progress.log(f"达到最大重试次数，跳过下载《{song_name}》")
+        return None
+
+    def _discard_partial(self, video_id: str):
+        """删除视频在临时目录中未完成的文件"""
+        for path in self.temp_dir.glob(f"{glob.escape(video_id)}.*"):
+            path.unlink(missing_ok=True)
+
+    def fetch(self, song_name: str, resolved: Dict) -> Optional[Path]:
+        """
+        按搜索结果中的视频ID下载歌曲的原始音频，已下载的部分不再重复下载
+        :param song_name: 歌曲名称
+        :param resolved: resolve 返回的搜索结果
+        :return: 原始音频文件路径，失败时为None
+        """
+        video_id = resolved['video_id']
+        state = self.state.get(song_name)
+        if state is not None and state['video_id'] == video_id:
+            # 上次运行已下载完成但未转码
+            if state['status'] == 'fetched' and state['source'] and Path(state['source']).exists():
+                return Path(state['source'])
+            if state['status'] == 'downloading' and state['attempts']:
+                self.progress.log(f"继续下载《{song_name}》(已尝试 {state['attempts']} 次)")
+
+        # 优先使用搜索时选定的格式，该格式不再可用时重新选择
+        format_spec = f"{resolved['format_id']}/bestaudio/best" if resolved.get('format_id') else 'bestaudio/best'
+
+        while True:
+            # 尝试次数跨运行累计，中断前用掉的次数不会重新计算
+            attempt = self.state.start_attempt(song_name, video_id)
+            self._local.song = song_name
+            self.progress.start_download(song_name)
+            try:
+                ydl = self._get_ydl(format_spec)
+                info = ydl.extract_info(resolved.get('url') or video_id, download=True)
+                source = self._downloaded_path(ydl, info)
+                self.state.fetched(song_name, source)
+                return source
+            except Exception as e:
+                self.state.record_error(song_name, str(e))
+                self.progress.log(f"下载《{song_name}》时出现错误 (尝试 {attempt}/{self.max_retries}): {str(e)}")
+            finally:
+                self._local.song = None
+                self.progress.finish_download(song_name)
+            if attempt >= self.max_retries:
+                break
+            time.sleep(self.retry_delay)
+
+        # 视频可能已被删除，下次运行时重新搜索
+        self.index.invalidate(song_name)
+        self.state.failed(song_name)
+        self._discard_partial(video_id)
+        self.progress.log(f"达到最大重试次数，跳过下载《{song_name}》")
+        return None
+
+    def _probe(self, song_name: str, path: Path, expected_duration: Optional[float] = None) -> Tuple[bool, Optional[Dict]]:
+        """
+        检查音频文件可以正常读取且时长完整，没有安装 ffprobe 时不检查
+        :param song_name: 歌曲名称
+        :param path: 文件路径
+        :param expected_duration: 来源视频的时长（秒）
+        :return: 文件是否完好，以及 ffprobe 读取的时长和编码
+        """
+        if self.ffprobe is None:
+            return True, None
+        probe = probe_audio(self.ffprobe, path)
+        if probe is None:
+            self.progress.log(f"《{song_name}》的文件无法读取，可能已损坏")
+            return False, None
+        if expected_duration and probe['duration'] < expected_duration * 0.98 - 1:
+            self.progress.log(
+                f"《{song_name}》的文件不完整: 时长 {probe['duration']:.0f} 秒，应为 {expected_duration:.0f} 秒")
+            return False, probe
+        return True, probe
+
+    def is_downloaded(self, song_name: str) -> bool:
+        """
+        根据清单判断歌曲是否已完整下载，不完整的歌曲从清单中删除
+        :param song_name: 歌曲名称
+        :return: 是否已完整下载
+        """
+        if self.manifest.get(song_name) is not None:
+            if self.manifest.is_complete(song_name) and (not self.verify or self.manifest.verify(song_name)):
+                return True
+            self.progress.log(f"《{song_name}》的文件不完整或已损坏，重新下载")
+            self.manifest.remove(song_name)
+            return False
+
+        # 建立清单之前下载的文件，确认可以正常读取后加入清单
+        clean_name = clean_filename(song_name)
+        for ext in AUDIO_EXTENSIONS:
+            path = self.download_dir / f"{clean_name}{ext}"
+            if self.manifest.file_size(path.name) is None:
+                continue
+            ok, probe = self._probe(song_name, path)
+            if not ok:
+                self.progress.log(f"《{song_name}》重新下载")
+                return False
+            self.manifest.record(song_name, path, duration=probe and probe['duration'], codec=probe and probe['codec'])
+            return True
+        return False
+
+    def plan(self, source: Path, resolved: Optional[Dict] = None) -> Tuple[str, str, Optional[str]]:
+        """
+        根据格式策略和原始文件的编码决定如何处理原始文件
+        :param source: 原始音频文件路径
+        :param resolved: resolve 返回的搜索结果，没有 ffprobe 时使用其中的编码
+        :return: plan_conversion 返回的 (处理方式, 目标扩展名, FFmpeg 封装格式)
+        """
+        if self.format_policy == 'keep':
+            return plan_conversion('keep', None, source.suffix)
+        probe = probe_audio(self.ffprobe, source) if self.ffprobe is not None else None
+        codec = normalize_codec(probe['codec'] if probe else (resolved or {}).get('acodec'))
+        return plan_conversion(self.format_policy, codec, source.suffix)
+
+    def convert(self, song_name: str, source: Path, resolved: Optional[Dict] = None,
+                plan: Optional[Tuple[str, str, Optional[str]]] = None) -> Optional[Path]:
+        """
+        按格式策略处理原始音频（直接移动、只换封装或转为 FLAC），检查完整性后记入清单
+        :param song_name: 歌曲名称
+        :param source: 原始音频文件路径
+        :param resolved: resolve 返回的搜索结果
+        :param plan: plan 返回的处理方式，为None时重新判断
+        :return: 最终文件路径，失败时为None
+        """
+        resolved = resolved or {}
+        action, ext, muxer = plan or self.plan(source, resolved)
+        target = self.download_dir / f"{clean_filename(song_name)}{ext}"
+        partial = target.with_name(target.name + '.part')
+        if action == 'move':
+            os.replace(source, partial)
+        elif self.ffmpeg is None:
+            self.progress.log(f"转码《{song_name}》失败: 找不到 FFmpeg，请确认已添加到系统环境变量中")
+            return None
+        else:
+            if action == 'transcode':
+                self.progress.start_convert(song_name)
+            try:
+                result = subprocess.run(
+                    [self.ffmpeg, '-y', '-v', 'error', '-i', str(source), *ffmpeg_args(action, muxer), str(partial)],
+                    capture_output=True, text=True
+                )
+            finally:
+                if action == 'transcode':
+                    self.progress.finish_convert(song_name)
+            source.unlink(missing_ok=True)
+            if result.returncode != 0:
+                error = result.stderr.strip().splitlines()
+                self.progress.log(f"转码《{song_name}》失败: {error[-1] if error else result.returncode}")
+                partial.unlink(missing_ok=True)
+                self.state.record_error(song_name, error[-1] if error else f"FFmpeg 退出码 {result.returncode}")
+                self.state.failed(song_name)
+                return None
+
+        ok, probe = self._probe(song_name, partial, resolved.get('duration'))
+        if not ok:
+            partial.unlink(missing_ok=True)
+            self.state.failed(song_name)
+            return None
+        os.replace(partial, target)
+        self.manifest.record(song_name, target, resolved.get('video_id'),
+                             duration=probe['duration'] if probe else resolved.get('duration'),
+                             codec=probe['codec'] if probe else ('flac' if action == 'transcode' else None))
+        self.state.clear(song_name)
+        with self._lock:
+            self.actions[action] += 1
+        return target
+
+    def download(self, song_name: str) -> bool:
+        """
+        在当前线程中依次完成搜索、下载和转码
+        :param song_name: 歌曲名称
+        :return: 是否下载成功
+        """
+        if self.is_downloaded(song_name):
+            print(f"《{song_name}》已存在，跳过下载")
             return True
-    return False
 
-def download_music(song_name: str, max_retries: int = 3) -> bool:
+        print(f"正在搜索并下载: {song_name}")
+        resolved = self.resolve(song_name)
+        source = self.fetch(song_name, resolved) if resolved is not None else None
+        if source is None or self.convert(song_name, source, resolved) is None:
+            self.progress.close()
+            return False
+        self.progress.log(f"《{song_name}》下载完成！")
+        self.progress.close()
+        return True
+
+    def batch(self, songs: List[str], workers: int = 4, convert_workers: Optional[int] = None) -> int:
+        """
+        并发下载多首歌曲
+        :param songs: 歌曲名称列表
+        :param workers: 同时搜索的线程数，以及同时下载的线程数
+        :param convert_workers: 同时转为 FLAC 的 FFmpeg 进程数，默认为 CPU 核数的一半
+        :return: 成功（包括已存在）的歌曲数
+        """
+        convert_workers = convert_workers or max(1, (os.cpu_count() or 2) // 2)
+        # 同名歌曲只下载一次，否则会同时写入同一个临时文件
+        songs = list(dict.fromkeys(songs))
+        # 上次中断时未完成的歌曲优先处理，尽快用上已下载的部分并释放临时文件
+        unfinished = set(self.state.unfinished())
+        songs = sorted(songs, key=lambda song: song not in unfinished)
+        self.progress = BatchProgress(len(songs))
+        # 限制等待转码的文件数，转码跟不上时下载线程暂停，避免临时文件堆积
+        convert_slots = threading.BoundedSemaphore(convert_workers * 2)
+        download_futures: List[Future] = []
+        convert_futures: List[Future] = []
+        futures_lock = threading.Lock()
+
+        def convert_task(song_name: str, source: Path, resolved: Dict, plan: Tuple[str, str, Optional[str]]):
+            try:
+                target = self.convert(song_name, source, resolved, plan)
+            except Exception as e:
+                self.progress.log(f"转码《{song_name}》时出现错误: {str(e)}")
+                target = None
+            finally:
+                if plan[0] == 'transcode':
+                    convert_slots.release()
+            if target is None:
+                self.progress.finish('failed')
+            else:
+                self.progress.log(f"《{song_name}》下载完成！")
+                self.progress.finish('success')
+
+        def download_task(song_name: str, resolved: Dict):
+            try:
+                source = self.fetch(song_name, resolved)
+            except Exception as e:
+                self.progress.log(f"下载《{song_name}》时出现错误: {str(e)}")
+                source = None
+            if source is None:
+                self.progress.finish('failed')
+                return
+            plan = self.plan(source, resolved)
+            if plan[0] != 'transcode':
+                # 移动文件和换封装只是复制数据，直接在下载线程中完成
+                convert_task(song_name, source, resolved, plan)
+                return
+            convert_slots.acquire()
+            future = convert_pool.submit(convert_task, song_name, source, resolved, plan)
+            with futures_lock:
+                convert_futures.append(future)
+
+        def resolve_task(song_name: str):
+            if self.is_downloaded(song_name):
+                self.progress.finish('skipped')
+                return
+            try:
+                resolved = self.resolve(song_name)
+            except Exception as e:
+                self.progress.log(f"搜索《{song_name}》时出现错误: {str(e)}")
+                resolved = None
+            if resolved is None:
+                self.progress.finish('failed')
+                return
+            future = download_pool.submit(download_task, song_name, resolved)
+            with futures_lock:
+                download_futures.append(future)
+
+        # 搜索完成的歌曲立即开始下载，不必等待所有歌曲搜索结束
+        with ThreadPoolExecutor(max_workers=convert_workers) as convert_pool, \
+                ThreadPoolExecutor(max_workers=workers) as download_pool, \
+                ThreadPoolExecutor(max_workers=workers) as resolve_pool:
+            for future in [resolve_pool.submit(resolve_task, song) for song in songs]:
+                future.result()
+            for future in download_futures:
+                future.result()
+            for future in convert_futures:
+                future.result()
+
+        self.progress.close()
+        if self.index_hits:
+            print(f"其中 {self.index_hits} 首歌曲使用了索引中的搜索结果")
+        if any(self.actions.values()):
+            print(f"保留原始文件 {self.actions['move']} 首，只换封装 {self.actions['remux']} 首，"
+                  f"转码为 FLAC {self.actions['transcode']} 首")
+        failures = self.state.failures()
+        failed_songs = [song for song in songs if song in failures]
+        if failed_songs:
+            print(f"以下 {len(failed_songs)} 首歌曲下载失败，下次运行时会重新尝试:")
+            for song in failed_songs:
+                print(f"  {song}: {failures[song] or '未知错误'}")
+        return self.progress.succeeded + self.progress.skipped
+
+    def close(self):
+        """关闭所有线程创建的 YoutubeDL 实例、索引和清单"""
+        with self._lock:
+            instances, self._instances = self._instances, []
+        for ydl in instances:
+            ydl.close()
+        self.index.close()
+        self.manifest.close()
+        self.state.close()
+
+def download_music(song_name: str, max_retries: int = 3, index_ttl: float = 7 * 24 * 3600,
+                   verify: bool = False, format_policy: str = 'auto') -> bool:
     """
     下载音乐文件
     :param song_name: 歌曲名称
     :param max_retries: 最大重试次数
+    :param index_ttl: 索引中搜索结果的有效期（秒），0表示重新搜索
+    :param verify: 已下载时重新计算校验和确认文件完好
+    :param format_policy: 格式策略，见 format_policy.FORMAT_POLICIES
     :return: 是否下载成功
     """
-    # 设置下载目录
-    current_dir = Path(__file__).parent
-    download_dir = current_dir / "download"
-    download_dir.mkdir(parents=True, exist_ok=True)
-    
-    # 检查文件是否已存在
-    if is_file_exists(download_dir, song_name):
-        print(f"《{song_name}》已存在，跳过下载")
-        return True
-    
-    # 优化搜索关键词，添加"原版"或"官方"等关键词
-    search_query = f"{song_name} 原版 官方"
-    
-    # 配置yt-dlp选项
-    ydl_opts = {
-        'format': 'bestaudio/best',
-        'postprocessors': [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'flac',
-            'preferredquality': '0',  # 最高质量
-        }],
-        'outtmpl': str(download_dir / f'{clean_filename(song_name)}.%(ext)s'),
-        'quiet': False,
-        'no_warnings': False,
-        'progress_hooks': [lambda d: print(f"\r下载进度: {d['_percent_str']}", end='') if d['status'] == 'downloading' else None],
-        'extract_flat': False,
-        'noplaylist': True,
-        'prefer_ffmpeg': True,
-        'keepvideo': False,
-    }
-    
-    for attempt in range(max_retries):
-        try:
-            print(f"\n正在搜索并下载: {song_name} (尝试 {attempt + 1}/{max_retries})")
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([f"ytsearch:{search_query}"])
-            print(f"\n《{song_name}》下载完成！")
-            time.sleep(2)  # 添加延迟避免请求过于频繁
-            return True
-        except Exception as e:
-            print(f"\n下载《{song_name}》时出现错误: {str(e)}")
-            if attempt < max_retries - 1:
-                print(f"等待 5 秒后重试...")
-                time.sleep(5)
-            else:
-                print(f"达到最大重试次数，跳过下载《{song_name}》")
-                return False
+    downloader = MusicDownloader(max_retries=max_retries, index_ttl=index_ttl, verify=verify,
+                                 format_policy=format_policy)
+    try:
+        return downloader.download(song_name)
+    finally:
+        downloader.close()
 
-def batch_download():
-    """批量下载歌曲"""
+def batch_download(workers: int = 4, convert_workers: Optional[int] = None, index_ttl: float = 7 * 24 * 3600,
+                   verify: bool = False, format_policy: str = 'auto'):
+    """
+    批量下载歌曲
+    :param workers: 同时搜索的线程数，以及同时下载的线程数
+    :param convert_workers: 同时转码的 FFmpeg 进程数，默认为 CPU 核数的一半
+    :param index_ttl: 索引中搜索结果的有效期（秒），0表示重新搜索所有歌曲
+    :param verify: 跳过已下载的歌曲前重新计算校验和
+    :param format_policy: 格式策略，见 format_policy.FORMAT_POLICIES
+    """
     current_dir = Path(__file__).parent
     list_file = current_dir / "audio_list.txt"
-    
+
     if not list_file.exists():
         print("错误：找不到 audio_list.txt 文件！")
         return
-    
+
     try:
         with open(list_file, 'r', encoding='utf-8') as f:
             # 跳过注释行和空行
@@ -89,31 +640,43 @@ def batch_download():
     except Exception as e:
         print(f"读取歌曲列表时出现错误: {str(e)}")
         return
-    
+
     if not songs:
         print("歌曲列表为空！")
         return
-    
+
+    unique_songs = list(dict.fromkeys(songs))
+    if len(unique_songs) < len(songs):
+        print(f"跳过 {len(songs) - len(unique_songs)} 个重复的歌曲名称")
+    songs = unique_songs
     total_songs = len(songs)
-    successful_downloads = 0
-    
     print(f"共找到 {total_songs} 首歌曲待下载")
-    
-    for i, song in enumerate(songs, 1):
-        print(f"\n[{i}/{total_songs}] 开始下载")
-        if download_music(song):
-            successful_downloads += 1
-    
+
+    downloader = MusicDownloader(index_ttl=index_ttl, verify=verify, format_policy=format_policy)
+    try:
+        successful_downloads = downloader.batch(songs, workers, convert_workers)
+    finally:
+        downloader.close()
+
     print(f"\n下载完成！成功: {successful_downloads}/{total_songs}")
 
 if __name__ == "__main__":
-    if len(sys.argv) == 1:
-        batch_download()
-    elif len(sys.argv) == 2:
-        song_name = sys.argv[1]
-        download_music(song_name)
-    else:
-        print("使用方法:")
-        print("1. 批量下载: python music_downloader.py")
-        print("2. 下载单首: python music_downloader.py '歌曲名称'")
-        sys.exit(1) 
\ No newline at end of file
+    parser = argparse.ArgumentParser(
+        description='音乐下载器',
+        epilog="1. 批量下载: python music_downloader.py\n2. 下载单首: python music_downloader.py '歌曲名称'",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('song', nargs='?', help='要下载的歌曲名称，不指定时批量下载 audio_list.txt 中的歌曲')
+    parser.add_argument('-j', '--workers', type=int, default=4, help='批量下载时同时搜索的线程数，以及同时下载的线程数')
+    parser.add_argument('--convert-workers', type=int, help='批量下载时同时转码的 FFmpeg 进程数，默认为 CPU 核数的一半')
+    parser.add_argument('--index-ttl', type=float, default=7, help='索引中搜索结果的有效期（天），0表示重新搜索所有歌曲')
+    parser.add_argument('--verify', action='store_true', help='跳过已下载的歌曲前重新计算校验和，而不只比较文件大小')
+    parser.add_argument('--format-policy', choices=FORMAT_POLICIES, default='auto',
+                        help='auto: 无损音源转为FLAC，有损音源只换封装；remux: 只换封装；keep: 保留原始文件；flac: 全部转为FLAC')
+    args = parser.parse_args()
+    index_ttl = args.index_ttl * 24 * 3600
+
+    if args.song is None:
+        batch_download(args.workers, args.convert_workers, index_ttl, args.verify, args.format_policy)
+    elif not download_music(args.song, index_ttl=index_ttl, verify=args.verify, format_policy=args.format_policy):
+        sys.exit(1)
@@ -0,0 +1,74 @@
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+# 缓存的搜索结果字段
+INDEX_FIELDS = ['video_id', 'url', 'title', 'duration', 'format_id', 'ext', 'acodec', 'abr']
+
+class SongIndex:
+    """
+    歌曲到视频ID的本地索引
+
+    保存每首歌曲搜索得到的视频ID和选定的音频格式，超过有效期的记录视为过期，
+    需要重新搜索。重复运行和重试时直接使用索引中的视频ID，不再搜索。
+    """
+
+    def __init__(self, db_path: Path, ttl: float = 7 * 24 * 3600):
+        """
+        :param db_path: 索引数据库路径
+        :param ttl: 记录的有效期（秒），0表示不使用已有记录
+        """
+        self.ttl = ttl
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS songs ("
+                "song TEXT PRIMARY KEY, video_id TEXT NOT NULL, url TEXT, title TEXT, duration REAL, "
+                "format_id TEXT, ext TEXT, acodec TEXT, abr REAL, resolved_at REAL NOT NULL)"
+            )
+
+    def get(self, song_name: str) -> Optional[Dict]:
+        """
+        查询歌曲的搜索结果
+        :param song_name: 歌曲名称
+        :return: 未过期的记录，没有或已过期时为None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(INDEX_FIELDS)}, resolved_at FROM songs WHERE song = ?", (song_name,)
+            ).fetchone()
+        if row is None or time.time() - row[-1] >= self.ttl:
+            return None
+        return dict(zip(INDEX_FIELDS, row[:-1]))
+
+    def put(self, song_name: str, resolved: Dict):
+        """
+        保存歌曲的搜索结果
+        :param song_name: 歌曲名称
+        :param resolved: 包含 INDEX_FIELDS 字段的搜索结果
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO songs (song, {', '.join(INDEX_FIELDS)}, resolved_at) "
+                f"VALUES (?, {', '.join('?' * len(INDEX_FIELDS))}, ?)",
+                (song_name, *(resolved.get(field) for field in INDEX_FIELDS), time.time())
+            )
+
+    def invalidate(self, song_name: str):
+        """
+        删除歌曲的搜索结果，下次下载时重新搜索
+        :param song_name: 歌曲名称
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM songs WHERE song = ?", (song_name,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM songs").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,42 @@
+import os
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from music_downloader import MusicDownloader
+
+
+def test_batch_downloads_duplicate_names_once(tmp_path):
+    downloader = MusicDownloader(download_dir=tmp_path)
+    fetched = Counter()
+    lock = threading.Lock()
+
+    def fetch(song_name, resolved):
+        with lock:
+            fetched[song_name] += 1
+        source = downloader.temp_dir / f"{resolved['video_id']}.m4a"
+        source.write_bytes(b'audio')
+        return source
+
+    def convert(song_name, source, resolved, plan):
+        target = tmp_path / f"{song_name}.m4a"
+        os.replace(source, target)
+        return target
+
+    downloader.is_downloaded = lambda song_name: False
+    downloader.resolve = lambda song_name: {'video_id': f"id-{song_name}"}
+    downloader.fetch = fetch
+    downloader.plan = lambda source, resolved: ('move', '.m4a', None)
+    downloader.convert = convert
+    try:
+        succeeded = downloader.batch(['songA', 'songB', 'songA', 'songA'], workers=4)
+    finally:
+        downloader.close()
+
+    assert succeeded == 2
+    assert fetched == {'songA': 1, 'songB': 1}
+    assert downloader.progress.failed == 0
+    assert Path(tmp_path / 'songA.m4a').exists()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+解析后端基准测试
+
+在固定的HTML语料上比较各解析后端的正文提取结果与原始实现是否一致，以及每秒处理的页面数。
+
+    python benchmark_parsers.py
+    python benchmark_parsers.py --pages 500 --rounds 3
+    python benchmark_parsers.py --corpus ./html_pages
+"""
+
+import os
+import time
+import random
+import argparse
+from typing import List, Tuple
+from bs4 import BeautifulSoup
+from rich.console import Console
+from rich.table import Table
+from parsers import available_backends, clean_text, parse_page
+
+WORDS = ['网页', '内容', '抓取', '数据', '文章', '新闻', 'python', 'crawler', 'content',
+         'article', 'section', 'the', 'quick', 'brown', 'fox', '测试', '段落', '标题']
+
+
+def legacy_extract_content(html: str) -> str:
+    """
+    原始的正文提取实现：先移除元素，再逐个尝试CSS选择器，最后整体get_text
+
+    Args:
+        html (str): 页面HTML
+
+    Returns:
+        str: 提取的文本内容
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    for element in soup(['script', 'style', 'nav', 'header', 'footer', 'aside']):
+        element.decompose()
+
+    main_content = None
+    for selector in ['article', '.article-content', '.article-body', '.content',
+                     '.main-content', '#content', '.post-content', '.entry-content']:
+        main_content = soup.select_one(selector)
+        if main_content:
+            break
+    if not main_content:
+        main_content = soup
+
+    return clean_text(main_content.get_text(separator='\n', strip=True))
+
+
+def _sentence(rng: random.Random, low: int = 4, high: int = 20) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+
+def _paragraphs(rng: random.Random, count: int) -> str:
+    parts = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.6:
+            parts.append(f"<p>{_sentence(rng)} <a href=\"/p/{rng.randint(1, 999)}\">{_sentence(rng, 1, 3)}</a> {_sentence(rng)}</p>")
+        elif kind < 0.75:
+            items = ''.join(f"<li>{_sentence(rng, 2, 6)}</li>" for _ in range(rng.randint(2, 6)))
+            parts.append(f"<ul>{items}</ul>")
+        elif kind < 0.85:
+            rows = ''.join(f"<tr><td>{_sentence(rng, 1, 3)}</td><td>{rng.randint(0, 9999)}</td></tr>"
+                           for _ in range(rng.randint(2, 5)))
+            parts.append(f"<table>{rows}</table>")
+        elif kind < 0.92:
+            parts.append(f"<div><!-- {_sentence(rng, 2, 4)} --><span>{_sentence(rng)}</span> x</div>")
+        else:
+            parts.append(f"<script>var s = '{_sentence(rng, 2, 4)}';</script><p>{_sentence(rng)}</p>")
+    return '\n'.join(parts)
+
+
+def build_corpus(count: int = 200, seed: int = 42) -> List[Tuple[str, str]]:
+    """
+    生成固定的HTML语料，覆盖不同的正文容器、导航、脚本和注释
+
+    Args:
+        count (int): 页面数量
+        seed (int): 随机种子，相同种子生成相同语料
+
+    Returns:
+        List[Tuple[str, str]]: (URL, HTML)列表
+    """
+    rng = random.Random(seed)
+    wrappers = [
+        '<article>{body}</article>',
+        '<div class="article-content">{body}</div>',
+        '<div class="post content wide">{body}</div>',
+        '<div id="content">{body}</div>',
+        '<div class="entry-content">{body}</div>',
+        '<div class="main"><div class="main-content">{body}</div><article>{body}</article></div>',
+        '<div class="wrapper">{body}</div>',
+        '<nav class="content">{nav}</nav><div class="post-content">{body}</div>',
+    ]
+    corpus = []
+    for i in range(count):
+        nav = ''.join(f'<a href="/c/{j}">{_sentence(rng, 1, 2)}</a>' for j in range(rng.randint(5, 30)))
+        body = _paragraphs(rng, rng.randint(5, 80))
+        main = rng.choice(wrappers).format(body=body, nav=nav)
+        html = (
+            f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{_sentence(rng, 2, 6)}</title>"
+            f"<style>body {{ color: #333; }}</style></head><body>"
+            f"<header><h1>{_sentence(rng, 2, 5)}</h1><nav>{nav}</nav></header>"
+            f"{main}<aside>{_paragraphs(rng, 3)}</aside>"
+            f"<footer><p>{_sentence(rng)}</p></footer></body></html>"
+        )
+        corpus.append((f"https://example.com/page/{i}", html))
+    return corpus
+
+
+def load_corpus(directory: str) -> List[Tuple[str, str]]:
+    """
+    从目录读取.html文件作为语料
+
+    Args:
+        directory (str): 语料目录
+
+    Returns:
+        List[Tuple[str, str]]: (URL, HTML)列表
+    """
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(('.html', '.htm')):
+            with open(os.path.join(directory, name), 'r', encoding='utf-8', errors='replace') as f:
+                corpus.append((f"https://example.com/{name}", f.read()))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description='解析后端基准测试')
+    parser.add_argument('--pages', type=int, default=200, help='生成的语料页面数')
+    parser.add_argument('--seed', type=int, default=42, help='语料随机种子')
+    parser.add_argument('--corpus', help='使用目录中的.html文件作为语料')
+    parser.add_argument('--rounds', type=int, default=1, help='每个后端重复运行的轮数')
+    args = parser.parse_args()
+
+    console = Console()
+    corpus = load_corpus(args.corpus) if args.corpus else build_corpus(args.pages, args.seed)
+    total_bytes = sum(len(html.encode('utf-8')) for _, html in corpus)
+    console.print(f"[cyan]语料: {len(corpus)} 个页面，共 {total_bytes / 1024 / 1024:.1f} MB[/cyan]")
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        expected = [legacy_extract_content(html) for _, html in corpus]
+    legacy_elapsed = time.perf_counter() - start
+
+    table = Table(title="正文提取基准")
+    table.add_column("后端")
+    table.add_column("页面/秒", justify="right")
+    table.add_column("相对原始实现", justify="right")
+    table.add_column("结果一致", justify="right")
+    legacy_rate = len(corpus) * args.rounds / legacy_elapsed
+    table.add_row("原始实现 (html.parser)", f"{legacy_rate:.1f}", "1.00x", "-")
+
+    for backend in available_backends():
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            results = [parse_page(html, url, backend, with_links=True)[0] for url, html in corpus]
+        elapsed = time.perf_counter() - start
+        rate = len(corpus) * args.rounds / elapsed
+        matched = sum(1 for got, want in zip(results, expected) if got == want)
+        table.add_row(backend, f"{rate:.1f}", f"{rate / legacy_rate:.2f}x", f"{matched}/{len(corpus)}")
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,24 +3,99 @@
 
 import os
 import time
-import random
-from typing import Optional, Dict, List
+import heapq
+import asyncio
+import itertools
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Awaitable, Callable, Optional, Dict, List, Set, Tuple
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 from fake_useragent import UserAgent
 from rich.console import Console
-from rich.progress import Progress
-from docx import Document
-from urllib.parse import urljoin, urlparse
+from rich.progress import Progress, TextColumn
+from rich.table import Table
+from urllib.parse import urlparse
+from scheduler import HostScheduler
+from frontier import URLFrontier
+from state import CrawlState
+from http_cache import ResponseCache
+from segment_store import SegmentStore
+from docx_writer import DocxWriter, write_docx
+from dedup import NearDuplicateIndex
+from metrics import CrawlMetrics
+from retry import CircuitBreaker, RetryPolicy, classify_error
+from parsers import available_backends, decode_content, is_valid_url, parse_document, parse_links
+
+try:
+    import aiohttp
+except ImportError:  # 异步模式为可选功能
+    aiohttp = None
+
+# 允许解析的响应类型，未声明Content-Type的响应也会被解析
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain')
+
+# 流式读取响应时每次读取的字节数
+CHUNK_SIZE = 64 * 1024
+
+
+class ResponseRejected(Exception):
+    """响应类型不是HTML或大小超过限制，读取正文前即被拒绝"""
+
+
+class RetryLater(Exception):
+    """请求失败或站点熔断，需要延后重试"""
+    
+    def __init__(self, delay: float, attempt: int):
+        super().__init__(f"{delay:.1f} 秒后重试")
+        self.delay = delay
+        self.attempt = attempt
+        
 
 class WebCrawler:
-    def __init__(self, save_dir: str = "downloaded_content"):
+    def __init__(self, save_dir: str = "downloaded_content", min_interval: float = 1.0,
+                 max_interval: float = 3.0, respect_robots: bool = False,
+                 pool_connections: int = 10, pool_maxsize: int = 10, max_retries: int = 2,
+                 state_file: Optional[str] = None, cache_file: Optional[str] = None,
+                 parser_backend: str = 'html.parser', parse_workers: int = 0, queue_size: int = 100,
+                 max_body_size: int = 10 * 1024 * 1024, segment_size: int = 64 * 1024 * 1024,
+                 docx_workers: int = 1, docx_merge: Optional[str] = None, docx_batch_size: int = 100,
+                 dedup: bool = False, dedup_distance: int = 3,
+                 metrics_json: Optional[str] = None, metrics_prom: Optional[str] = None,
+                 retry_base_delay: float = 1.0, breaker_threshold: int = 5, breaker_timeout: float = 30.0):
         """
         初始化爬虫
         
         Args:
             save_dir (str): 保存文件的目录
+            min_interval (float): 同一站点两次请求之间的最小间隔（秒）
+            max_interval (float): 同一站点两次请求之间的最大间隔（秒）
+            respect_robots (bool): 是否遵守robots.txt中的Crawl-delay
+            pool_connections (int): 连接池缓存的站点数量
+            pool_maxsize (int): 每个站点连接池的最大连接数
+            max_retries (int): 超时、连接错误、429和5xx等临时错误的最大重试次数
+            state_file (Optional[str]): 批量抓取的状态数据库路径，设置后可中断续抓
+            cache_file (Optional[str]): 响应缓存数据库路径，设置后使用条件请求增量抓取
+            parser_backend (str): HTML解析后端，'html.parser'、'lxml'或'selectolax'
+            parse_workers (int): 异步模式下的解析进程数，0表示在线程池中解析
+            queue_size (int): 异步流水线各阶段之间队列的最大长度
+            max_body_size (int): 响应正文的最大字节数，超过时放弃下载
+            segment_size (int): 'jsonl'格式下单个压缩分段文件的最大字节数
+            docx_workers (int): 后台生成DOCX的进程数，0表示在保存时直接生成
+            docx_merge (Optional[str]): DOCX合并方式，'batch'按批次、'domain'按域名，None表示每个页面一个文件
+            docx_batch_size (int): 合并时每个DOCX包含的页面数
+            dedup (bool): 是否跳过正文近似重复或规范URL已保存的页面
+            dedup_distance (int): SimHash指纹视为近似重复的最大汉明距离
+            metrics_json (Optional[str]): 批量/递归抓取结束时写入JSON统计摘要的路径
+            metrics_prom (Optional[str]): 批量/递归抓取结束时写入Prometheus文本格式统计的路径
+            retry_base_delay (float): 指数退避的基础时间（秒）
+            breaker_threshold (int): 站点连续失败多少次后熔断
+            breaker_timeout (float): 站点首次熔断的时长（秒），再次失败时加倍
         """
+        if parser_backend not in available_backends():
+            raise ValueError(f"解析后端不可用: {parser_backend}，可用的后端: {', '.join(available_backends())}")
+            
+
         self.ua = UserAgent()
         self.save_dir = save_dir
         self.console = Console()
@@ -38,8 +113,109 @@ class WebCrawler:
             'Upgrade-Insecure-Requests': '1',
         }
         
-        # 设置请求延迟范围（秒）
-        self.delay_range = (1, 3)
+        # 按站点调度请求间隔，不同站点之间互不等待
+        self.scheduler = HostScheduler(min_interval, max_interval, respect_crawl_delay=respect_robots)
+        
+        # 复用连接的HTTP会话，同一站点的请求共享TCP/TLS连接
+        self.session = self._create_session(pool_connections, pool_maxsize)
+        
+        # 失败请求按错误类型重试，连续失败的站点熔断，熔断期间该站点的URL延后处理
+        self.retry_policy = RetryPolicy(max_retries, retry_base_delay)
+        self.breaker_threshold = breaker_threshold
+        self.breaker_timeout = breaker_timeout
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_timeout)
+        
+        # 批量抓取的断点状态，续抓时跳过已完成和失败次数达到上限的URL
+        self.state_file = state_file
+        self.state: Optional[CrawlState] = None
+        self.max_failed_attempts = 3
+        
+        # 增量抓取的响应缓存，页面未变化时跳过解析和保存
+        self.cache = ResponseCache(cache_file) if cache_file else None
+        
+        # HTML解析后端
+        self.parser_backend = parser_backend
+        
+        # 异步流水线：解析进程数、写文件线程数和阶段间队列长度
+        self.parse_workers = parse_workers
+        self.write_workers = 2
+        self.queue_size = queue_size
+        
+        # 响应正文大小上限
+        self.max_body_size = max_body_size
+        
+        # 'jsonl'格式的分段存储，首次保存时创建
+        self.segment_size = segment_size
+        self.store: Optional[SegmentStore] = None
+        self._store_lock = threading.Lock()
+        
+        # 近似重复检测：规范URL和SimHash指纹索引
+        self.dedup = NearDuplicateIndex(dedup_distance) if dedup else None
+        
+        # 吞吐量和分阶段耗时统计
+        self.metrics = CrawlMetrics()
+        self.metrics_json = metrics_json
+        self.metrics_prom = metrics_prom
+        
+        # 后台DOCX写入器，不在抓取路径上生成文档；生成失败的页面记录在_save_errors中
+        self._save_errors: Dict[str, str] = {}
+        self._save_errors_lock = threading.Lock()
+        self.docx_writer: Optional[DocxWriter] = None
+        if docx_workers > 0 or docx_merge is not None:
+            self.docx_writer = DocxWriter(save_dir, max(1, docx_workers), docx_merge, docx_batch_size, queue_size)
+        
+    def _create_session(self, pool_connections: int, pool_maxsize: int) -> requests.Session:
+        """
+        创建带连接池的HTTP会话
+        
+        连接池本身不做重试：重试由RetryPolicy按错误类型安排，延后的请求不会阻塞当前线程。
+        
+        Args:
+            pool_connections (int): 连接池缓存的站点数量
+            pool_maxsize (int): 每个站点连接池的最大连接数
+            
+        Returns:
+            requests.Session: HTTP会话
+        """
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=0
+        )
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update(self.headers)
+        return session
+        
+    def close(self):
+        """
+        关闭HTTP会话，释放连接池
+        """
+        self.session.close()
+        if self.docx_writer is not None:
+            self.docx_writer.close()
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        
+    @property
+    def delay_range(self):
+        """同一站点的请求延迟范围（秒）"""
+        return self.scheduler.interval_range
+        
+    @delay_range.setter
+    def delay_range(self, value):
+        self.scheduler.interval_range = value
         
     def _get_random_headers(self) -> Dict[str, str]:
         """
@@ -52,12 +228,60 @@ class WebCrawler:
         headers['User-Agent'] = self.ua.random
         return headers
         
-    def _add_delay(self):
+    def _get_robots_url(self, url: str) -> str:
         """
-        添加随机延迟
+        获取URL所在站点的robots.txt地址
+        
+        Args:
+            url (str): 页面URL
+            
+        Returns:
+            str: robots.txt的URL
         """
-        delay = random.uniform(*self.delay_range)
-        time.sleep(delay)
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+        
+    def _add_delay(self, url: str):
+        """
+        按站点添加延迟，同一站点的请求按间隔排队
+        
+        Args:
+            url (str): 即将请求的URL
+        """
+        if self.scheduler.needs_robots(url):
+            robots_txt = None
+            try:
+                response = self.session.get(
+                    self._get_robots_url(url),
+                    headers=self._get_random_headers(),
+                    timeout=10,
+                    verify=False
+                )
+                if response.status_code == 200:
+                    robots_txt = response.text
+            except Exception:
+                pass
+            self.scheduler.set_robots(url, robots_txt)
+        self.scheduler.wait(url)
+        
+    async def _add_delay_async(self, session: 'aiohttp.ClientSession', url: str):
+        """
+        异步版本的_add_delay
+        
+        Args:
+            session (aiohttp.ClientSession): 共享的异步HTTP会话
+            url (str): 即将请求的URL
+        """
+        if self.scheduler.needs_robots(url):
+            robots_txt = None
+            try:
+                async with session.get(self._get_robots_url(url), headers=self._get_random_headers()) as response:
+                    if response.status == 200:
+                        robots_txt = await response.text(errors='replace')
+            except Exception:
+                pass
+            self.scheduler.set_robots(url, robots_txt)
+        await self.scheduler.wait_async(url)
         
     def _is_valid_url(self, url: str) -> bool:
         """
@@ -69,11 +293,7 @@ class WebCrawler:
         Returns:
             bool: URL是否有效
         """
-        try:
-            result = urlparse(url)
-            return all([result.scheme, result.netloc])
-        except:
-            return False
+        return is_valid_url(url)
             
     def _get_filename_from_url(self, url: str) -> str:
         """
@@ -112,128 +332,1029 @@ class WebCrawler:
             filename (str): 文件名
         """
         filepath = os.path.join(self.save_dir, f"{filename}.docx")
-        doc = Document()
-        doc.add_paragraph(content)
-        doc.save(filepath)
+        write_docx(filepath, [(None, content)])
+        
+    def _timed(self, stage: str, func: Callable, *args):
+        """
+        调用函数并记录耗时到指定阶段，可在线程池中执行
+        
+        Args:
+            stage (str): 阶段名称
+            func (Callable): 要调用的函数
+            *args: 函数参数
+            
+        Returns:
+            函数的返回值
+        """
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.metrics.observe(stage, time.perf_counter() - started)
+            
+    def _create_progress(self) -> Progress:
+        """
+        创建进度条，在默认列之后显示滚动速率和请求耗时
+        
+        Returns:
+            Progress: 进度条，添加任务时需要传入stats字段
+        """
+        return Progress(*Progress.get_default_columns(), TextColumn("[magenta]{task.fields[stats]}"),
+                        console=self.console)
+                        
+    def _report_metrics(self):
+        """
+        打印各站点的请求耗时和各阶段平均耗时，并按设置导出统计文件
+        """
+        summary = self.metrics.summary()
+        if summary['hosts']:
+            table = Table(title=f"抓取统计（{summary['pages_per_second']:.2f} 页/秒，"
+                                f"{summary['bytes_per_second'] / 1024:.1f} KB/秒）")
+            table.add_column("站点")
+            table.add_column("请求数", justify="right")
+            table.add_column("p50", justify="right")
+            table.add_column("p95", justify="right")
+            table.add_column("最大", justify="right")
+            table.add_column("KB", justify="right")
+            for host, stats in summary['hosts'].items():
+                table.add_row(host, str(stats['count']), f"{stats['p50']:.3f}s", f"{stats['p95']:.3f}s",
+                              f"{stats['max']:.3f}s", f"{stats['bytes'] / 1024:.1f}")
+            self.console.print(table)
+            stages = '  '.join(f"{stage} {stats['mean'] * 1000:.1f}ms" for stage, stats in summary['stages'].items())
+            self.console.print(f"[cyan]各阶段平均耗时: {stages}[/cyan]")
+            
+        if self.metrics_json:
+            self.metrics.write_json(self.metrics_json)
+            self.console.print(f"[green]统计摘要已保存: {self.metrics_json}[/green]")
+        if self.metrics_prom:
+            self.metrics.write_prometheus(self.metrics_prom)
+            self.console.print(f"[green]Prometheus指标已保存: {self.metrics_prom}[/green]")
+            
+    def _get_store(self) -> SegmentStore:
+        """
+        获取'jsonl'格式的分段存储，位于保存目录下的segments子目录
+        
+        Returns:
+            SegmentStore: 分段存储
+        """
+        with self._store_lock:
+            if self.store is None:
+                self.store = SegmentStore(os.path.join(self.save_dir, 'segments'), self.segment_size)
+            return self.store
+            
+    def _check_response_headers(self, headers):
+        """
+        在读取正文之前检查响应类型和声明的大小
+        
+        Args:
+            headers: 响应头（大小写不敏感的映射）
+            
+        Raises:
+            ResponseRejected: 响应不是HTML或超过大小限制
+        """
+        content_type = headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type and content_type not in HTML_CONTENT_TYPES:
+            raise ResponseRejected(f"跳过非HTML内容: {content_type}")
+            
+        content_length = headers.get('Content-Length')
+        if content_length and content_length.isdigit() and int(content_length) > self.max_body_size:
+            raise ResponseRejected(f"响应大小 {content_length} 字节超过限制 {self.max_body_size} 字节")
+            
+    def _read_limited(self, chunks) -> bytes:
+        """
+        流式读取响应正文，超过大小限制时立即中止
         
-    def _extract_content(self, soup: BeautifulSoup) -> str:
+        Args:
+            chunks: 响应正文的分块迭代器
+            
+        Returns:
+            bytes: 响应正文
         """
-        提取页面主要内容
+        body = bytearray()
+        for chunk in chunks:
+            body.extend(chunk)
+            if len(body) > self.max_body_size:
+                raise ResponseRejected(f"响应超过大小限制 {self.max_body_size} 字节，已中止下载")
+        return bytes(body)
+        
+    def _fetch_response(self, url: str, headers: Dict[str, str]) -> Tuple:
+        """
+        按站点延迟后流式请求页面
         
         Args:
-            soup (BeautifulSoup): BeautifulSoup对象
+            url (str): 要请求的URL
+            headers (Dict[str, str]): 请求头
             
         Returns:
-            str: 提取的文本内容
+            Tuple: (状态码, 响应头, 响应正文, 声明的编码)
         """
-        # 移除不需要的元素
-        for element in soup(['script', 'style', 'nav', 'header', 'footer', 'aside']):
-            element.decompose()
+        # 按站点添加延迟，等待时间不计入请求耗时
+        self._add_delay(url)
+        started = time.perf_counter()
+        
+        # 发送请求，先检查响应头再读取正文
+        with self.session.get(
+            url,
+            headers=headers,
+            timeout=10,
+            verify=False,  # 忽略SSL证书验证
+            stream=True
+        ) as response:
+            # requests没有DNS和建立连接的钩子，这两段耗时计入首字节
+            headers_at = time.perf_counter()
+            self.metrics.observe('ttfb', headers_at - started)
+            response.raise_for_status()
+            self._check_response_headers(response.headers)
+            content = self._read_limited(response.iter_content(chunk_size=CHUNK_SIZE))
+            finished = time.perf_counter()
+            self.metrics.observe('body', finished - headers_at)
+            self.metrics.observe_fetch(urlparse(url).netloc.lower(), finished - started, len(content))
+            return response.status_code, response.headers, content, response.encoding
             
-        # 尝试找到主要内容区域
-        main_content = None
+    def _fetch_html(self, url: str) -> str:
+        """
+        按站点延迟后请求页面并返回HTML文本
         
-        # 常见的文章内容容器
-        content_selectors = [
-            'article',
-            '.article-content',
-            '.article-body',
-            '.content',
-            '.main-content',
-            '#content',
-            '.post-content',
-            '.entry-content'
-        ]
+        Args:
+            url (str): 要请求的URL
+            
+        Returns:
+            str: 页面HTML
+        """
+        _, _, content, encoding = self._fetch_response(url, self._get_random_headers())
+        return decode_content(content, encoding)
+        
+    def _get_request_headers(self, url: str) -> Dict[str, str]:
+        """
+        生成抓取页面的请求头，开启缓存时附带条件请求头
         
-        for selector in content_selectors:
-            main_content = soup.select_one(selector)
-            if main_content:
-                break
+        Args:
+            url (str): 要请求的URL
+            
+        Returns:
+            Dict[str, str]: 请求头字典
+        """
+        headers = self._get_random_headers()
+        if self.cache is not None:
+            headers.update(self.cache.conditional_headers(url))
+        return headers
+        
+    def _content_hash(self, status: int, content: bytes) -> Optional[str]:
+        """
+        计算响应正文哈希，未开启缓存或响应为304时返回None
+        
+        Args:
+            status (int): HTTP状态码
+            content (bytes): 响应正文
+            
+        Returns:
+            Optional[str]: 正文哈希
+        """
+        if self.cache is None or status == 304:
+            return None
+        return self.cache.hash_content(content)
+        
+    def _unchanged_links(self, url: str, status: int, headers, content_hash: Optional[str],
+                         with_links: bool) -> Optional[List[str]]:
+        """
+        判断页面是否未变化（服务器返回304或正文哈希相同）
+        
+        Args:
+            url (str): 页面URL
+            status (int): HTTP状态码
+            headers: 响应头（大小写不敏感的映射）
+            content_hash (Optional[str]): 正文哈希
+            with_links (bool): 是否返回缓存的页面链接
+            
+        Returns:
+            Optional[List[str]]: 页面未变化时返回缓存的链接列表，否则为None
+        """
+        if self.cache is None:
+            return None
+        if status == 304 or self.cache.is_unchanged(url, content_hash):
+            self.cache.update(url, headers.get('ETag'), headers.get('Last-Modified'))
+            self.console.print(f"[yellow]页面未变化，跳过: {url}[/yellow]")
+            return self.cache.cached_links(url) if with_links else []
+        return None
+        
+    def _skip_saved_canonical(self, url: str) -> bool:
+        """
+        请求前检查URL是否已作为其他页面的规范URL保存过，是则跳过并记录为完成
+        
+        Args:
+            url (str): 页面URL
+            
+        Returns:
+            bool: 是否跳过
+        """
+        if self.dedup is None or not self.dedup.is_saved(url):
+            return False
+        self.console.print(f"[yellow]规范URL已保存，跳过: {url}[/yellow]")
+        self._record_result(url)
+        return True
+        
+    def _save_page(self, url: str, text: str, links: List[str], save_format: str,
+                   headers=None, content_hash: Optional[str] = None,
+                   canonical: Optional[str] = None) -> Optional[str]:
+        """
+        保存提取的文本，更新响应缓存，并记录抓取结果
+        
+        'jsonl'格式的记录先进入内存中的批次、后台生成的DOCX先进入写入器，写入磁盘后才更新缓存
+        并记录结果，进程中断时未写入的页面在续抓时重新抓取。
+        
+        Args:
+            url (str): 页面URL
+            text (str): 提取的文本内容
+            links (List[str]): 页面链接
+            save_format (str): 保存格式，'txt'、'docx'或'jsonl'
+            headers: 响应头，用于记录ETag和Last-Modified
+            content_hash (Optional[str]): 正文哈希
+            canonical (Optional[str]): 页面声明的规范URL
+            
+        Returns:
+            Optional[str]: 保存的文件名（不含扩展名），'jsonl'格式下为分段文件名，重复页面为None
+        """
+        if self.dedup is not None:
+            duplicate_of = self.dedup.check(url, text, canonical)
+            if duplicate_of is not None:
+                if self.cache is not None and headers is not None:
+                    self.cache.update(url, headers.get('ETag'), headers.get('Last-Modified'), content_hash, links)
+                self.console.print(f"[yellow]重复页面，跳过: {url} ≈ {duplicate_of}[/yellow]")
+                self._record_result(url)
+                return None
                 
-        if not main_content:
-            main_content = soup
-            
-        # 获取文本
-        text = main_content.get_text(separator='\n', strip=True)
-        
-        # 清理文本
-        lines = []
-        for line in text.split('\n'):
-            line = line.strip()
-            if line and len(line) > 1:  # 过滤空行和单字符行
-                lines.append(line)
+        if save_format.lower() == 'jsonl':
+            def written():
+                if self.cache is not None and headers is not None:
+                    self.cache.update(url, headers.get('ETag'), headers.get('Last-Modified'), content_hash, links)
+                self._record_result(url)
                 
-        return '\n'.join(lines)
+            # 追加到压缩分段，不为每个页面单独创建文件
+            segment = self._get_store().append(url, text, on_written=written)
+            self.console.print(f"[green]成功保存: {url} -> {segment}[/green]")
+            return segment
+            
+        # 生成文件名
+        filename = self._get_filename_from_url(url)
         
-    def crawl_page(self, url: str, save_format: str = 'txt') -> bool:
+        # 保存文件，后台生成的DOCX由写入器在完成时输出结果
+        background = save_format.lower() == 'docx' and self.docx_writer is not None
+        if background:
+            def saved(error: Optional[str]):
+                if error is not None:
+                    with self._save_errors_lock:
+                        self._save_errors[url] = error
+                elif self.cache is not None and headers is not None:
+                    self.cache.update(url, headers.get('ETag'), headers.get('Last-Modified'), content_hash, links)
+                self._record_result(url, error)
+                
+            return self.docx_writer.save(url, filename, text, on_saved=saved)
+        elif save_format.lower() == 'docx':
+            self._save_as_docx(text, filename)
+        else:
+            self._save_as_txt(text, filename)
+            
+        if self.cache is not None and headers is not None:
+            self.cache.update(url, headers.get('ETag'), headers.get('Last-Modified'), content_hash, links)
+            
+        self.console.print(f"[green]成功保存: {filename}.{save_format}[/green]")
+        self._record_result(url)
+        return filename
+        
+    def _handle_response(self, url: str, status: int, headers, content: bytes,
+                         encoding: Optional[str], save_format: str,
+                         with_links: bool) -> Tuple[str, List[str]]:
         """
-        爬取单个页面
+        处理页面响应：未变化的页面直接跳过，否则解析、保存并更新缓存
+        
+        Args:
+            url (str): 页面URL
+            status (int): HTTP状态码
+            headers: 响应头（大小写不敏感的映射）
+            content (bytes): 响应正文
+            encoding (Optional[str]): 响应头中声明的编码
+            save_format (str): 保存格式，'txt'、'docx'或'jsonl'
+            with_links (bool): 是否返回页面链接
+            
+        Returns:
+            Tuple[str, List[str]]: 保存的文本内容和链接列表，页面未变化时文本为空字符串
+        """
+        content_hash = self._content_hash(status, content)
+        unchanged = self._unchanged_links(url, status, headers, content_hash, with_links)
+        if unchanged is not None:
+            self._record_result(url)
+            return '', unchanged
+            
+        # 开启缓存时总是记录链接，以便页面未变化时仍能继续递归抓取
+        text, links, canonical = self._timed('parse', parse_document, content, encoding, url,
+                                             self.parser_backend, with_links or self.cache is not None)
+        self._timed('write', self._save_page, url, text, links, save_format, headers, content_hash, canonical)
+        return text, links if with_links else []
+        
+    def _open_state(self, resume: bool) -> Optional[CrawlState]:
+        """
+        打开批量抓取的状态数据库
+        
+        Args:
+            resume (bool): 是否保留已有状态继续抓取，否则清空重新开始
+            
+        Returns:
+            Optional[CrawlState]: 状态存储，未设置state_file时为None
+        """
+        if not self.state_file:
+            return None
+        self.state = CrawlState(self.state_file)
+        if resume:
+            counts = self.state.counts()
+            if counts:
+                self.console.print(
+                    f"[yellow]继续上次抓取: 已完成 {counts.get('done', 0)}，"
+                    f"失败 {counts.get('failed', 0)}，待抓取 {counts.get('pending', 0)}[/yellow]"
+                )
+        else:
+            self.state.reset()
+        return self.state
+        
+    def _flush_buffers(self):
+        """
+        写入分段存储和DOCX写入器中缓冲的页面，返回时这些页面的结果都已记录
+        """
+        if self.store is not None:
+            self.store.flush()
+        if self.docx_writer is not None:
+            self.docx_writer.flush()
+            
+    def _take_save_errors(self) -> Dict[str, str]:
+        """
+        取出后台写入失败的页面及其错误信息
+        
+        Returns:
+            Dict[str, str]: URL到错误信息的映射
+        """
+        with self._save_errors_lock:
+            errors, self._save_errors = self._save_errors, {}
+        return errors
+        
+    def _wait_saved(self, url: str, text: Optional[str]) -> Optional[str]:
+        """
+        等待分段存储写入页面所在的批次、后台写入器生成页面所在的文档，单页抓取的结果因此包含写入是否成功
+        
+        Args:
+            url (str): 页面URL
+            text (Optional[str]): 抓取得到的文本，失败时为None
+            
+        Returns:
+            Optional[str]: 页面写入成功时为文本，否则为None
+        """
+        if text is None:
+            return text
+        self._flush_buffers()
+        return None if url in self._take_save_errors() else text
+        
+    def _close_state(self):
+        """
+        写入分段存储和DOCX写入器中缓冲的页面，再提交并关闭状态数据库
+        """
+        self._flush_buffers()
+        if self.state is not None:
+            self.state.close()
+            self.state = None
+            
+    def _record_result(self, url: str, error: Optional[str] = None):
+        """
+        记录URL的抓取结果：计入吞吐量统计，开启状态存储时写入状态数据库
+        
+        Args:
+            url (str): 页面URL
+            error (Optional[str]): 错误信息，成功时为None
+        """
+        self.metrics.page_done(error is None)
+        if self.state is None:
+            return
+        if error is None:
+            self.state.mark_done(url)
+        else:
+            self.state.mark_failed(url, error)
+            
+    def _retry_delay(self, url: str, error: Exception, attempt: int) -> Optional[float]:
+        """
+        对请求错误分类，更新站点熔断状态，并计算重试前的等待时间
+        
+        Args:
+            url (str): 页面URL
+            error (Exception): 请求抛出的异常
+            attempt (int): 本次请求的重试序号，首次请求为0
+            
+        Returns:
+            Optional[float]: 等待秒数，不应重试时为None
+        """
+        host = self.scheduler.get_host(url)
+        retryable, status, retry_after = classify_error(error)
+        if not retryable:
+            # 站点正常响应了错误状态码或被拒绝的内容，只是这个URL无法抓取
+            if status is not None or isinstance(error, ResponseRejected):
+                self.breaker.record_success(host)
+            return None
+            
+        opened = self.breaker.record_failure(host, retry_after if status in (429, 503) else None)
+        if opened is not None:
+            self.console.print(f"[yellow]站点 {host} 暂停请求 {opened:.0f} 秒，其URL延后处理[/yellow]")
+        return self.retry_policy.delay(attempt, retry_after)
+        
+    def _attempt_page(self, url: str, save_format: str, with_links: bool,
+                      attempt: int = 0) -> Tuple[Optional[str], List[str]]:
+        """
+        尝试抓取一次页面，成功或不可重试的失败都会记录结果
         
         Args:
             url (str): 要爬取的URL
-            save_format (str): 保存格式，'txt'或'docx'
+            save_format (str): 保存格式，'txt'、'docx'或'jsonl'
+            with_links (bool): 是否同时提取页面链接
+            attempt (int): 重试序号，首次请求为0
             
         Returns:
-            bool: 是否成功
+            Tuple[Optional[str], List[str]]: 保存的文本内容（失败时为None）和链接列表
+            
+        Raises:
+            RetryLater: 请求遇到临时错误或站点处于熔断状态，需要延后重试
         """
         if not self._is_valid_url(url):
             self.console.print(f"[red]无效的URL: {url}[/red]")
-            return False
+            self._record_result(url, "无效的URL")
+            return None, []
+            
+        if self._skip_saved_canonical(url):
+            return '', []
+            
+        host = self.scheduler.get_host(url)
+        if self.breaker.given_up(host):
+            self.console.print(f"[red]爬取失败: 站点 {host} 多次熔断后仍不可用: {url}[/red]")
+            self._record_result(url, "站点不可用")
+            return None, []
+        wait = self.breaker.allow(host)
+        if wait > 0:
+            raise RetryLater(wait, attempt)
+        probe = self.breaker.is_probing(host)
             
         try:
-            # 添加随机延迟
-            self._add_delay()
-            
-            # 发送请求
-            response = requests.get(
-                url,
-                headers=self._get_random_headers(),
-                timeout=10,
-                verify=False  # 忽略SSL证书验证
-            )
-            response.raise_for_status()
+            # 只有网络请求的错误参与重试分类和熔断
+            try:
+                response = self._fetch_response(url, self._get_request_headers(url))
+            except Exception as e:
+                delay = self._retry_delay(url, e, attempt)
+                if delay is not None:
+                    self.console.print(f"[yellow]请求失败，{delay:.1f} 秒后第 {attempt + 1} 次重试: {url}（{e}）[/yellow]")
+                    raise RetryLater(delay, attempt + 1) from e
+                self.console.print(f"[red]爬取失败: {str(e)}[/red]")
+                self._record_result(url, str(e))
+                return None, []
+            self.breaker.record_success(host)
+        finally:
+            # 探测请求无论结果如何都要结束，否则站点会一直处于探测状态
+            if probe:
+                self.breaker.release_probe(host)
             
-            # 设置正确的编码
-            if response.encoding == 'ISO-8859-1':
-                response.encoding = response.apparent_encoding
+        # 成功的结果由_handle_response在页面保存后记录
+        try:
+            return self._handle_response(url, *response, save_format, with_links)
+        except Exception as e:
+            self.console.print(f"[red]爬取失败: {str(e)}[/red]")
+            self._record_result(url, str(e))
+            return None, []
+        
+    def _crawl_with_retries(self, url: str, save_format: str, with_links: bool) -> Tuple[Optional[str], List[str]]:
+        """
+        抓取单个页面，需要重试时在当前线程等待
+        """
+        attempt = 0
+        while True:
+            try:
+                return self._attempt_page(url, save_format, with_links, attempt)
+            except RetryLater as later:
+                time.sleep(later.delay)
+                attempt = later.attempt
                 
-            # 解析HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # 提取内容
-            text = self._extract_content(soup)
+    def crawl_page(self, url: str, save_format: str = 'txt') -> bool:
+        """
+        爬取单个页面
+        
+        Args:
+            url (str): 要爬取的URL
+            save_format (str): 保存格式，'txt'、'docx'或'jsonl'
             
-            # 生成文件名
-            filename = self._get_filename_from_url(url)
+        Returns:
+            bool: 是否成功
+        """
+        text, _ = self._crawl_with_retries(url, save_format, False)
+        return self._wait_saved(url, text) is not None
+        
+    def crawl_page_with_links(self, url: str, save_format: str = 'txt') -> Tuple[Optional[str], List[str]]:
+        """
+        爬取单个页面并同时提取链接，只请求和解析一次
+        
+        Args:
+            url (str): 要爬取的URL
+            save_format (str): 保存格式，'txt'、'docx'或'jsonl'
             
-            # 保存文件
-            if save_format.lower() == 'docx':
-                self._save_as_docx(text, filename)
+        Returns:
+            Tuple[Optional[str], List[str]]: 保存的文本内容（失败时为None）和链接列表
+        """
+        text, links = self._crawl_with_retries(url, save_format, True)
+        text = self._wait_saved(url, text)
+        return text, links if text is not None else []
+        
+    def _run_sequential(self, next_item: Callable[[], Optional[Tuple[str, int]]],
+                        on_done: Callable[[str, int, Optional[str], List[str]], None],
+                        save_format: str, with_links: bool = False):
+        """
+        顺序抓取：需要重试的URL放入延后队列，到期前先处理其他URL
+        
+        Args:
+            next_item (Callable): 返回下一个(URL, 深度)的函数，没有更多URL时返回None
+            on_done (Callable): 每个URL处理结束后的回调，参数为URL、深度、文本（失败时为None）和链接
+            save_format (str): 保存格式，'txt'、'docx'或'jsonl'
+            with_links (bool): 是否需要页面链接
+        """
+        deferred: List[Tuple[float, int, str, int, int]] = []
+        counter = itertools.count()
+        while True:
+            if deferred and deferred[0][0] <= time.monotonic():
+                _, _, url, depth, attempt = heapq.heappop(deferred)
             else:
-                self._save_as_txt(text, filename)
+                item = next_item()
+                if item is None:
+                    if not deferred:
+                        return
+                    time.sleep(max(0.0, deferred[0][0] - time.monotonic()))
+                    continue
+                (url, depth), attempt = item, 0
+            try:
+                text, links = self._attempt_page(url, save_format, with_links, attempt)
+            except RetryLater as later:
+                heapq.heappush(deferred, (time.monotonic() + later.delay, next(counter), url, depth, later.attempt))
+                continue
+            on_done(url, depth, text, links)
+            
+    async def _fetch_async(self, session: 'aiohttp.ClientSession', url: str,
+                           host_limits: Dict[str, asyncio.Semaphore], per_host_limit: int) -> Tuple:
+        """
+        异步请求页面，只负责网络I/O
+        
+        Args:
+            session (aiohttp.ClientSession): 共享的异步HTTP会话
+            url (str): 要请求的URL
+            host_limits (Dict[str, asyncio.Semaphore]): 每个主机的并发信号量
+            per_host_limit (int): 单个主机的最大并发数
+            
+        Returns:
+            Tuple: (状态码, 响应头, 响应正文, 声明的编码)
+        """
+        host = urlparse(url).netloc.lower()
+        if host not in host_limits:
+            host_limits[host] = asyncio.Semaphore(per_host_limit)
+            
+        async with host_limits[host]:
+            # 按站点添加延迟，只占用同一主机的并发名额
+            await self._add_delay_async(session, url)
+            
+            started = time.perf_counter()
+            async with session.get(url, headers=self._get_request_headers(url)) as response:
+                response.raise_for_status()
+                self._check_response_headers(response.headers)
                 
-            self.console.print(f"[green]成功保存: {filename}.{save_format}[/green]")
-            return True
+                # 流式读取正文，超过大小限制时立即中止
+                headers_at = time.perf_counter()
+                body = bytearray()
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    body.extend(chunk)
+                    if len(body) > self.max_body_size:
+                        raise ResponseRejected(f"响应超过大小限制 {self.max_body_size} 字节，已中止下载")
+                finished = time.perf_counter()
+                self.metrics.observe('body', finished - headers_at)
+                self.metrics.observe_fetch(host, finished - started, len(body))
+                return response.status, response.headers, bytes(body), response.charset
+                
+    def _create_async_session(self, concurrency: int, per_host_limit: int) -> 'aiohttp.ClientSession':
+        """
+        创建异步HTTP会话，连接池大小与并发限制一致
+        
+        Args:
+            concurrency (int): 全局最大并发请求数
+            per_host_limit (int): 单个主机的最大并发请求数
             
-        except Exception as e:
-            self.console.print(f"[red]爬取失败: {str(e)}[/red]")
-            return False
+        Returns:
+            aiohttp.ClientSession: 异步HTTP会话
+        """
+        if aiohttp is None:
+            raise RuntimeError("异步爬取需要安装aiohttp: pip install aiohttp")
             
-    def crawl_pages(self, urls: List[str], save_format: str = 'txt'):
+        connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=per_host_limit, ssl=False)
+        timeout = aiohttp.ClientTimeout(total=10)
+        return aiohttp.ClientSession(connector=connector, timeout=timeout, trace_configs=[self._create_trace_config()])
+        
+    def _create_trace_config(self) -> 'aiohttp.TraceConfig':
+        """
+        创建aiohttp请求跟踪，记录DNS解析、建立连接和首字节耗时
+        
+        Returns:
+            aiohttp.TraceConfig: 请求跟踪配置
+        """
+        trace = aiohttp.TraceConfig()
+        
+        async def on_request_start(session, ctx, params):
+            ctx.ready = time.perf_counter()
+            ctx.dns = 0.0
+            
+        async def on_dns_start(session, ctx, params):
+            ctx.dns_start = time.perf_counter()
+            
+        async def on_dns_end(session, ctx, params):
+            ctx.dns = time.perf_counter() - ctx.dns_start
+            self.metrics.observe('dns', ctx.dns)
+            
+        async def on_connect_start(session, ctx, params):
+            ctx.connect_start = time.perf_counter()
+            
+        async def on_connect_end(session, ctx, params):
+            # 建立连接的过程包含DNS解析，需要扣除
+            ctx.ready = time.perf_counter()
+            self.metrics.observe('connect', max(0.0, ctx.ready - ctx.connect_start - ctx.dns))
+            
+        async def on_request_end(session, ctx, params):
+            self.metrics.observe('ttfb', time.perf_counter() - ctx.ready)
+            
+        trace.on_request_start.append(on_request_start)
+        trace.on_dns_resolvehost_start.append(on_dns_start)
+        trace.on_dns_resolvehost_end.append(on_dns_end)
+        trace.on_connection_create_start.append(on_connect_start)
+        trace.on_connection_create_end.append(on_connect_end)
+        trace.on_request_end.append(on_request_end)
+        return trace
+            
+    async def _run_pipeline(self, next_item: Callable[[], Awaitable[Optional[Tuple[str, int]]]],
+                            on_done: Callable[[str, int, Optional[str], List[str]], Awaitable[None]],
+                            save_format: str, concurrency: int, per_host_limit: int,
+                            with_links: bool = False):
+        """
+        异步抓取流水线：抓取 -> 解析 -> 保存三个阶段由有界队列连接
+        
+        抓取阶段只做网络I/O；解析阶段在进程池中执行，可利用多核；保存阶段在独立线程中写文件。
+        队列满时上游阶段会等待，因此解析跟不上抓取时内存占用也有上限。
+        
+        Args:
+            next_item (Callable): 返回下一个(URL, 深度)的协程函数，没有更多URL时返回None
+            on_done (Callable): 每个URL处理结束后的回调，参数为URL、深度、文本（失败时为None）和链接
+            save_format (str): 保存格式，'txt'、'docx'或'jsonl'
+            concurrency (int): 全局最大并发请求数
+            per_host_limit (int): 单个主机的最大并发请求数
+            with_links (bool): 是否需要页面链接
+        """
+        loop = asyncio.get_running_loop()
+        parse_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        write_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        host_limits: Dict[str, asyncio.Semaphore] = {}
+        want_links = with_links or self.cache is not None
+        parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers) if self.parse_workers > 0 else None
+        write_pool = ThreadPoolExecutor(max_workers=self.write_workers)
+        retry_tasks: Set[asyncio.Task] = set()
+        
+        async def fail(url: str, depth: int, error: str):
+            self.console.print(f"[red]爬取失败: {error}[/red]")
+            self._record_result(url, error)
+            await on_done(url, depth, None, [])
+            
+        def defer(session: 'aiohttp.ClientSession', url: str, depth: int, attempt: int, delay: float):
+            # 延后的请求在独立任务中等待，不占用抓取协程
+            async def later():
+                await asyncio.sleep(delay)
+                await fetch(session, url, depth, attempt)
+            task = asyncio.create_task(later())
+            retry_tasks.add(task)
+            task.add_done_callback(retry_tasks.discard)
+            
+        async def fetch(session: 'aiohttp.ClientSession', url: str, depth: int, attempt: int):
+            host = self.scheduler.get_host(url)
+            if self.breaker.given_up(host):
+                await fail(url, depth, f"站点 {host} 多次熔断后仍不可用: {url}")
+                return
+            wait = self.breaker.allow(host)
+            if wait > 0:
+                defer(session, url, depth, attempt, wait)
+                return
+            probe = self.breaker.is_probing(host)
+            try:
+                try:
+                    response = await self._fetch_async(session, url, host_limits, per_host_limit)
+                except Exception as e:
+                    error = str(e) or type(e).__name__
+                    delay = self._retry_delay(url, e, attempt)
+                    if delay is not None:
+                        self.console.print(f"[yellow]请求失败，{delay:.1f} 秒后第 {attempt + 1} 次重试: {url}（{error}）[/yellow]")
+                        defer(session, url, depth, attempt + 1, delay)
+                    else:
+                        await fail(url, depth, error)
+                    return
+                self.breaker.record_success(host)
+            finally:
+                # 探测请求无论结果如何都要结束，包括协程被取消时
+                if probe:
+                    self.breaker.release_probe(host)
+            await parse_queue.put((url, depth, response))
+            
+        async def fetcher(session: 'aiohttp.ClientSession'):
+            while True:
+                item = await next_item()
+                if item is None:
+                    return
+                url, depth = item
+                if not self._is_valid_url(url):
+                    self.console.print(f"[red]无效的URL: {url}[/red]")
+                    self._record_result(url, "无效的URL")
+                    await on_done(url, depth, None, [])
+                    continue
+                if self._skip_saved_canonical(url):
+                    await on_done(url, depth, '', [])
+                    continue
+                await fetch(session, url, depth, 0)
+                
+        async def parser():
+            while True:
+                item = await parse_queue.get()
+                if item is None:
+                    return
+                url, depth, (status, headers, content, encoding) = item
+                try:
+                    content_hash = self._content_hash(status, content)
+                    unchanged = self._unchanged_links(url, status, headers, content_hash, with_links)
+                    if unchanged is not None:
+                        self._record_result(url)
+                        await on_done(url, depth, '', unchanged)
+                        continue
+                    started = time.perf_counter()
+                    text, links, canonical = await loop.run_in_executor(
+                        parse_pool, parse_document, content, encoding, url, self.parser_backend, want_links
+                    )
+                    self.metrics.observe('parse', time.perf_counter() - started)
+                except Exception as e:
+                    await fail(url, depth, str(e) or type(e).__name__)
+                    continue
+                await write_queue.put((url, depth, text, links, headers, content_hash, canonical))
+                
+        async def writer():
+            while True:
+                item = await write_queue.get()
+                if item is None:
+                    return
+                url, depth, text, links, headers, content_hash, canonical = item
+                try:
+                    await loop.run_in_executor(
+                        write_pool, self._timed, 'write', self._save_page,
+                        url, text, links, save_format, headers, content_hash, canonical
+                    )
+                except Exception as e:
+                    await fail(url, depth, str(e) or type(e).__name__)
+                    continue
+                await on_done(url, depth, text, links if with_links else [])
+                
+        parse_tasks = self.parse_workers if self.parse_workers > 0 else (os.cpu_count() or 1)
+        try:
+            async with self._create_async_session(concurrency, per_host_limit) as session:
+                parsers = [asyncio.create_task(parser()) for _ in range(parse_tasks)]
+                writers = [asyncio.create_task(writer()) for _ in range(self.write_workers)]
+                
+                await asyncio.gather(*(fetcher(session) for _ in range(max(1, concurrency))))
+                # 延后的请求可能再次延后，直到全部完成
+                while retry_tasks:
+                    await asyncio.gather(*list(retry_tasks))
+                
+                # 上游结束后依次关闭下游阶段
+                for _ in parsers:
+                    await parse_queue.put(None)
+                await asyncio.gather(*parsers)
+                for _ in writers:
+                    await write_queue.put(None)
+                await asyncio.gather(*writers)
+        finally:
+            if parse_pool is not None:
+                parse_pool.shutdown()
+            write_pool.shutdown()
+            
+    async def crawl_pages_async(self, urls: List[str], save_format: str = 'txt',
+                                concurrency: int = 10, per_host_limit: int = 2) -> Dict[str, bool]:
+        """
+        异步批量爬取页面，同时保持多个请求在途
+        
+        Args:
+            urls (List[str]): URL列表
+            save_format (str): 保存格式，'txt'、'docx'或'jsonl'
+            concurrency (int): 全局最大并发请求数
+            per_host_limit (int): 单个主机的最大并发请求数
+            
+        Returns:
+            Dict[str, bool]: 每个URL是否爬取成功
+        """
+        # 熔断状态只在本次抓取内有效，上次放弃的站点重新尝试
+        self.breaker = CircuitBreaker(self.breaker_threshold, self.breaker_timeout)
+        pending = iter(urls)
+        results: Dict[str, bool] = {}
+        
+        with self._create_progress() as progress:
+            task = progress.add_task("[cyan]爬取进度...", total=len(urls), stats='')
+            
+            async def next_item() -> Optional[Tuple[str, int]]:
+                url = next(pending, None)
+                return (url, 0) if url is not None else None
+                
+            async def on_done(url: str, depth: int, text: Optional[str], links: List[str]):
+                results[url] = text is not None
+                progress.update(task, advance=1, stats=self.metrics.progress_text())
+                
+            await self._run_pipeline(next_item, on_done, save_format, concurrency, per_host_limit)
+            
+        # 等待后台写入完成，写入失败的页面视为失败
+        self._flush_buffers()
+        for url in self._take_save_errors():
+            results[url] = False
+        return results
+        
+    def crawl_pages(self, urls: List[str], save_format: str = 'txt',
+                    concurrency: int = 1, per_host_limit: int = 2, resume: bool = False):
         """
         批量爬取页面
         
         Args:
             urls (List[str]): URL列表
-            save_format (str): 保存格式，'txt'或'docx'
+            save_format (str): 保存格式，'txt'、'docx'或'jsonl'
+            concurrency (int): 并发请求数，大于1时使用异步模式
+            per_host_limit (int): 异步模式下单个主机的最大并发请求数
+            resume (bool): 是否根据state_file中的状态跳过已完成的URL
+        """
+        # 每次批量抓取单独统计，不包含之前的调用和等待输入的时间
+        self.metrics = CrawlMetrics()
+        # 熔断状态同样只在本次抓取内有效，上次放弃的站点重新尝试
+        self.breaker = CircuitBreaker(self.breaker_threshold, self.breaker_timeout)
+        state = self._open_state(resume)
+        try:
+            if state is not None:
+                finished = state.finished_urls(self.max_failed_attempts)
+                urls = [url for url in urls if url not in finished]
+                for url in urls:
+                    state.add_pending(url)
+                state.flush()
+                
+            if concurrency > 1:
+                asyncio.run(self.crawl_pages_async(urls, save_format, concurrency, per_host_limit))
+                return
+                
+            pending = iter(urls)
+            with self._create_progress() as progress:
+                task = progress.add_task("[cyan]爬取进度...", total=len(urls), stats='')
+                
+                def next_item() -> Optional[Tuple[str, int]]:
+                    url = next(pending, None)
+                    return (url, 0) if url is not None else None
+                    
+                def on_done(url: str, depth: int, text: Optional[str], links: List[str]):
+                    progress.update(task, advance=1, stats=self.metrics.progress_text())
+                    
+                self._run_sequential(next_item, on_done, save_format)
+        finally:
+            self._close_state()
+            # 写入失败的页面已记录在状态和统计中
+            self._take_save_errors()
+            self._report_metrics()
+                
+    def crawl_site(self, start_urls: List[str], save_format: str = 'txt', max_depth: int = 2,
+                   max_pages: int = 100, same_domain: bool = True, allow_pattern: Optional[str] = None,
+                   deny_pattern: Optional[str] = None, concurrency: int = 1,
+                   per_host_limit: int = 2, resume: bool = False) -> Dict[str, bool]:
+        """
+        从起始URL出发按广度优先递归抓取页面
+        
+        Args:
+            start_urls (List[str]): 起始URL列表
+            save_format (str): 保存格式，'txt'、'docx'或'jsonl'
+            max_depth (int): 最大链接深度，起始URL为0
+            max_pages (int): 最多抓取的页面数
+            same_domain (bool): 是否只抓取起始URL所在的域名
+            allow_pattern (Optional[str]): URL必须匹配的正则表达式
+            deny_pattern (Optional[str]): URL匹配时被排除的正则表达式
+            concurrency (int): 并发请求数，大于1时使用异步模式
+            per_host_limit (int): 异步模式下单个主机的最大并发请求数
+            resume (bool): 是否从state_file中恢复待抓取队列和已见URL
+            
+        Returns:
+            Dict[str, bool]: 本次运行中每个已抓取URL是否成功
+        """
+        # 已见URL集合按页面数预估容量，每个页面平均约50个链接
+        frontier = URLFrontier(max_depth, max_pages, same_domain, allow_pattern, deny_pattern,
+                               seen_capacity=max(max_pages * 50, 100_000))
+        
+        # 每次递归抓取单独统计，不包含之前的调用和等待输入的时间
+        self.metrics = CrawlMetrics()
+        # 熔断状态同样只在本次抓取内有效，上次放弃的站点重新尝试
+        self.breaker = CircuitBreaker(self.breaker_threshold, self.breaker_timeout)
+        state = self._open_state(resume)
+        try:
+            if state is not None:
+                if resume:
+                    state.restore_frontier(frontier, self.max_failed_attempts)
+                frontier.on_add = state.add_pending
+            frontier.add_seeds(url for url in start_urls if self._is_valid_url(url))
+            
+            if concurrency > 1:
+                results = asyncio.run(self._crawl_frontier_async(frontier, save_format, concurrency, per_host_limit))
+            else:
+                results = self._crawl_frontier(frontier, save_format)
+        finally:
+            self._close_state()
+            self._report_metrics()
+            
+        # 后台写入失败的页面视为失败
+        for url in self._take_save_errors():
+            results[url] = False
+        return results
+            
+    def _crawl_frontier(self, frontier: URLFrontier, save_format: str) -> Dict[str, bool]:
+        """
+        顺序消费待抓取队列，并把新发现的链接加回队列
+        
+        Args:
+            frontier (URLFrontier): 待抓取队列
+            save_format (str): 保存格式，'txt'、'docx'或'jsonl'
+            
+        Returns:
+            Dict[str, bool]: 每个已抓取URL是否成功
+        """
+        results: Dict[str, bool] = {}
+        with self._create_progress() as progress:
+            task = progress.add_task("[cyan]爬取进度...", total=frontier.max_pages - frontier.popped, stats='')
+            
+            def on_done(url: str, depth: int, text: Optional[str], links: List[str]):
+                results[url] = text is not None
+                if text is not None and depth < frontier.max_depth:
+                    for link in links:
+                        frontier.add(link, depth + 1)
+                progress.update(task, advance=1, stats=self.metrics.progress_text())
+                
+            self._run_sequential(frontier.pop, on_done, save_format, with_links=True)
+                
+            progress.update(task, total=len(results))
+            
+        return results
+        
+    async def _crawl_frontier_async(self, frontier: URLFrontier, save_format: str,
+                                    concurrency: int, per_host_limit: int) -> Dict[str, bool]:
+        """
+        异步消费待抓取队列，处理完的页面把新发现的链接加回队列
+        
+        Args:
+            frontier (URLFrontier): 待抓取队列
+            save_format (str): 保存格式，'txt'、'docx'或'jsonl'
+            concurrency (int): 全局最大并发请求数
+            per_host_limit (int): 单个主机的最大并发请求数
+            
+        Returns:
+            Dict[str, bool]: 每个已抓取URL是否成功
         """
-        with Progress() as progress:
-            task = progress.add_task("[cyan]爬取进度...", total=len(urls))
+        results: Dict[str, bool] = {}
+        condition = asyncio.Condition()
+        in_flight = 0
+        
+        with self._create_progress() as progress:
+            task = progress.add_task("[cyan]爬取进度...", total=frontier.max_pages - frontier.popped, stats='')
             
-            for url in urls:
-                self.crawl_page(url, save_format)
-                progress.update(task, advance=1)
+            async def next_item() -> Optional[Tuple[str, int]]:
+                nonlocal in_flight
+                async with condition:
+                    # 队列暂时为空但仍有页面在处理时，等待新链接加入
+                    while not frontier and in_flight and not frontier.exhausted:
+                        await condition.wait()
+                    item = frontier.pop()
+                    if item is None:
+                        condition.notify_all()
+                        return None
+                    in_flight += 1
+                    return item
+                    
+            async def on_done(url: str, depth: int, text: Optional[str], links: List[str]):
+                nonlocal in_flight
+                async with condition:
+                    in_flight -= 1
+                    results[url] = text is not None
+                    if text is not None and depth < frontier.max_depth:
+                        for link in links:
+                            frontier.add(link, depth + 1)
+                    condition.notify_all()
+                progress.update(task, advance=1, stats=self.metrics.progress_text())
                 
+            await self._run_pipeline(next_item, on_done, save_format, concurrency, per_host_limit,
+                                     with_links=True)
+                                     
+            progress.update(task, total=len(results))
+            
+        return results
+        
     def extract_links(self, url: str) -> List[str]:
         """
         提取页面中的所有链接
@@ -245,32 +1366,9 @@ class WebCrawler:
             List[str]: 链接列表
         """
         try:
-            # 发送请求
-            response = requests.get(
-                url,
-                headers=self._get_random_headers(),
-                timeout=10,
-                verify=False  # 忽略SSL证书验证
-            )
-            response.raise_for_status()
-            
-            # 设置正确的编码
-            if response.encoding == 'ISO-8859-1':
-                response.encoding = response.apparent_encoding
-                
             # 解析HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
-            links = []
-            
-            for link in soup.find_all('a'):
-                href = link.get('href')
-                if href:
-                    # 转换为绝对URL
-                    absolute_url = urljoin(url, href)
-                    if self._is_valid_url(absolute_url):
-                        links.append(absolute_url)
-                        
-            return links
+            html = self._fetch_html(url)
+            return self._timed('extract', parse_links, html, url, self.parser_backend)
             
         except Exception as e:
             self.console.print(f"[red]提取链接失败: {str(e)}[/red]")
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+from frontier import normalize_url
+
+# 中文按单字切分，其他文字按单词切分
+TOKEN_PATTERN = re.compile(r'[\u4e00-\u9fff]|[^\W_]+')
+
+FINGERPRINT_BITS = 64
+
+
+def simhash(text: str, shingle_size: int = 3) -> Optional[int]:
+    """
+    计算文本的64位SimHash指纹，相似文本的指纹只有少数位不同
+
+    Args:
+        text (str): 文本
+        shingle_size (int): 每个特征包含的连续词数
+
+    Returns:
+        Optional[int]: 指纹，文本太短无法计算时为None
+    """
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    if len(tokens) < shingle_size:
+        return None
+
+    # 每个特征哈希转为二进制字符串，按列统计1的个数，超过半数的位置为1
+    rows = [
+        hashlib.blake2b(' '.join(tokens[i:i + shingle_size]).encode('utf-8'), digest_size=8).hexdigest()
+        for i in range(len(tokens) - shingle_size + 1)
+    ]
+    rows = [format(int(row, 16), '064b') for row in rows]
+    fingerprint = 0
+    for column in zip(*rows):
+        fingerprint = (fingerprint << 1) | (column.count('1') * 2 > len(rows))
+    return fingerprint
+
+
+class NearDuplicateIndex:
+    """
+    近似重复内容索引
+
+    用SimHash指纹比较页面正文，指纹按位分段建立LSH索引：汉明距离不超过max_distance的
+    两个指纹至少有一段完全相同，因此只需比较同段的候选指纹。页面声明的
+    <link rel=canonical>优先于正文比较，同一规范URL的页面只保存一份。
+    """
+
+    def __init__(self, max_distance: int = 3):
+        """
+        初始化索引
+
+        Args:
+            max_distance (int): 视为近似重复的最大汉明距离
+        """
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self._band_bits = FINGERPRINT_BITS // self.bands
+        self._band_mask = (1 << self._band_bits) - 1
+        self._tables: List[Dict[int, List[int]]] = [{} for _ in range(self.bands)]
+        self._owners: Dict[int, str] = {}
+        self._saved: set = set()
+        self._lock = threading.Lock()
+        # 被跳过的页面URL到已保存页面URL的映射
+        self.duplicates: Dict[str, str] = {}
+
+    def _band_keys(self, fingerprint: int) -> List[int]:
+        return [(fingerprint >> (band * self._band_bits)) & self._band_mask for band in range(self.bands)]
+
+    def _find_similar(self, fingerprint: int) -> Optional[str]:
+        """
+        查找与指纹近似的已保存页面（调用方需持有锁）
+        """
+        for table, key in zip(self._tables, self._band_keys(fingerprint)):
+            for candidate in table.get(key, ()):
+                if bin(candidate ^ fingerprint).count('1') <= self.max_distance:
+                    return self._owners[candidate]
+        return None
+
+    def is_saved(self, url: str) -> bool:
+        """
+        判断URL是否已作为其他页面的规范URL保存过，可在请求前跳过
+
+        Args:
+            url (str): 页面URL
+
+        Returns:
+            bool: 是否已保存
+        """
+        with self._lock:
+            return normalize_url(url) in self._saved
+
+    def check(self, url: str, text: str, canonical: Optional[str] = None) -> Optional[str]:
+        """
+        检查页面是否与已保存的页面重复，不重复时把页面加入索引
+
+        Args:
+            url (str): 页面URL
+            text (str): 提取的正文
+            canonical (Optional[str]): 页面声明的规范URL
+
+        Returns:
+            Optional[str]: 重复时为已保存页面的URL，否则为None
+        """
+        url = normalize_url(url)
+        key = normalize_url(canonical) if canonical else url
+        fingerprint = simhash(text)
+        with self._lock:
+            if key in self._saved:
+                duplicate_of = key
+            elif fingerprint is not None:
+                duplicate_of = self._find_similar(fingerprint)
+            else:
+                duplicate_of = None
+
+            if duplicate_of is not None and duplicate_of != url:
+                self.duplicates[url] = duplicate_of
+                return duplicate_of
+
+            self._saved.add(key)
+            self._saved.add(url)
+            if fingerprint is not None and fingerprint not in self._owners:
+                self._owners[fingerprint] = key
+                for table, band_key in zip(self._tables, self._band_keys(fingerprint)):
+                    table.setdefault(band_key, []).append(fingerprint)
+            return None
+
+    def __len__(self) -> int:
+        return len(self._owners)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+from docx import Document
+from rich.console import Console
+
+MERGE_MODES = ['batch', 'domain']
+
+
+def write_docx(filepath: str, pages: List[Tuple[Optional[str], str]]) -> int:
+    """
+    生成DOCX文件，可在进程池中执行
+
+    Args:
+        filepath (str): 文件路径
+        pages (List[Tuple[Optional[str], str]]): (标题, 正文)列表，标题为None时不添加标题
+
+    Returns:
+        int: 写入的页面数
+    """
+    doc = Document()
+    for title, content in pages:
+        if title is not None:
+            doc.add_heading(title, level=1)
+        doc.add_paragraph(content)
+    doc.save(filepath)
+    return len(pages)
+
+
+class DocxWriter:
+    """
+    后台DOCX写入器
+
+    DOCX文件在进程池中生成，抓取线程只负责提交任务。开启合并时，页面按批次或按域名
+    缓冲，每满batch_size个页面合并为一个文档，每个页面以其URL作为标题。保存页面时可以
+    附带回调，页面所在的文档生成完成或失败后调用，调用方据此确认页面已写入磁盘。
+    """
+
+    def __init__(self, save_dir: str, workers: int = 1, merge: Optional[str] = None,
+                 batch_size: int = 100, max_pending: int = 100):
+        """
+        初始化写入器
+
+        Args:
+            save_dir (str): 保存目录
+            workers (int): 生成DOCX的进程数
+            merge (Optional[str]): 合并方式，'batch'按批次、'domain'按域名，None表示每个页面一个文件
+            batch_size (int): 合并时每个文档包含的页面数
+            max_pending (int): 最多同时排队的文档数，达到时提交方等待
+        """
+        if merge is not None and merge not in MERGE_MODES:
+            raise ValueError(f"不支持的合并方式: {merge}，可选: {', '.join(MERGE_MODES)}")
+        self.save_dir = save_dir
+        self.workers = workers
+        self.merge = merge
+        self.batch_size = batch_size
+        self.console = Console()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending: Set[Future] = set()
+        self._buffers: Dict[str, List[Tuple[Optional[str], str]]] = {}
+        self._callbacks: Dict[str, List[Callable[[Optional[str]], None]]] = {}
+        self._next_index: Dict[str, int] = {}
+
+    def _merged_name(self, key: str) -> str:
+        """
+        为合并文档生成不与已有文件冲突的文件名（调用方需持有锁）
+        """
+        index = self._next_index.get(key, 0)
+        while os.path.exists(os.path.join(self.save_dir, f"{key}_{index:04d}.docx")):
+            index += 1
+        self._next_index[key] = index + 1
+        return f"{key}_{index:04d}"
+
+    def _submit(self, name: str, pages: List[Tuple[Optional[str], str]],
+                callbacks: List[Callable[[Optional[str]], None]]):
+        """
+        提交一个文档到进程池，排队的文档过多时等待；文档生成后以错误信息（成功时为None）调用回调
+        """
+        self._slots.acquire()
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            future = self._pool.submit(write_docx, os.path.join(self.save_dir, f"{name}.docx"), pages)
+            self._pending.add(future)
+
+        def done(future: Future):
+            try:
+                error = future.exception()
+                if error is not None:
+                    self.console.print(f"[red]保存失败: {name}.docx，{error}[/red]")
+                elif len(pages) > 1:
+                    self.console.print(f"[green]成功保存: {name}.docx（{len(pages)} 个页面）[/green]")
+                else:
+                    self.console.print(f"[green]成功保存: {name}.docx[/green]")
+                message = None if error is None else f"保存 {name}.docx 失败: {str(error) or type(error).__name__}"
+                for callback in callbacks:
+                    callback(message)
+            finally:
+                # 回调执行完才算完成，flush()返回时所有页面的结果都已记录
+                self._slots.release()
+                with self._lock:
+                    self._pending.discard(future)
+                    self._idle.notify_all()
+
+        future.add_done_callback(done)
+
+    def save(self, url: str, filename: str, content: str,
+             on_saved: Optional[Callable[[Optional[str]], None]] = None) -> str:
+        """
+        保存页面，不等待文件生成完成
+
+        Args:
+            url (str): 页面URL，合并时作为标题
+            filename (str): 不合并时使用的文件名（不含扩展名）
+            content (str): 页面文本
+            on_saved (Optional[Callable[[Optional[str]], None]]): 页面所在文档生成后调用的回调，
+                参数为错误信息，成功时为None
+
+        Returns:
+            str: 页面所在的文件名（不含扩展名），合并时为缓冲区名称
+        """
+        callbacks = [on_saved] if on_saved is not None else []
+        if self.merge is None:
+            self._submit(filename, [(None, content)], callbacks)
+            return filename
+
+        key = 'batch' if self.merge == 'batch' else (urlparse(url).hostname or 'unknown')
+        with self._lock:
+            buffer = self._buffers.setdefault(key, [])
+            buffer.append((url, content))
+            self._callbacks.setdefault(key, []).extend(callbacks)
+            if len(buffer) < self.batch_size:
+                return key
+            pages = self._buffers.pop(key)
+            callbacks = self._callbacks.pop(key)
+            name = self._merged_name(key)
+        self._submit(name, pages, callbacks)
+        return name
+
+    def flush(self):
+        """
+        提交所有未满一批的页面，并等待排队的文档全部生成、回调全部执行
+        """
+        with self._lock:
+            buffers = [(self._merged_name(key), pages, self._callbacks.pop(key, []))
+                       for key, pages in self._buffers.items()]
+            self._buffers = {}
+        for name, pages, callbacks in buffers:
+            self._submit(name, pages, callbacks)
+
+        with self._lock:
+            while self._pending:
+                self._idle.wait()
+
+    def close(self):
+        """
+        写入剩余页面并关闭进程池
+        """
+        self.flush()
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
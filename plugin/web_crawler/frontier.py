@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+import math
+import heapq
+import hashlib
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+# 归一化时去除的跟踪参数
+TRACKING_PARAMS = {
+    'gclid', 'fbclid', 'msclkid', 'yclid', 'spm',
+}
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    URL归一化，使同一页面的不同写法得到相同的结果
+
+    小写协议和主机名、去掉默认端口和锚点、空路径补为'/'、
+    去除utm_*等跟踪参数并对查询参数排序。
+
+    Args:
+        url (str): 原始URL
+
+    Returns:
+        str: 归一化后的URL
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').lower()
+    port = parsed.port
+    netloc = host if port is None or DEFAULT_PORTS.get(scheme) == port else f"{host}:{port}"
+    if parsed.username:
+        netloc = f"{parsed.username}@{netloc}"
+
+    query = [
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    ]
+    query.sort()
+
+    return urlunparse((scheme, netloc, parsed.path or '/', parsed.params, urlencode(query), ''))
+
+
+class BloomFilter:
+    """
+    布隆过滤器，用固定大小的位数组记录已见过的URL
+
+    1000万条URL、0.1%误判率约占用18MB内存，误判只会导致极少数页面被跳过。
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        """
+        初始化布隆过滤器
+
+        Args:
+            capacity (int): 预计元素数量
+            error_rate (float): 可接受的误判率
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> List[int]:
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, item: str) -> bool:
+        """
+        添加元素
+
+        Args:
+            item (str): 元素
+
+        Returns:
+            bool: 元素此前是否不存在
+        """
+        added = False
+        for pos in self._positions(item):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not self.bits[byte] & mask:
+                self.bits[byte] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class URLFrontier:
+    """
+    广度优先的待抓取队列
+
+    按深度优先级出队，负责URL归一化、去重、深度/数量限制以及域名和正则范围过滤。
+    """
+
+    def __init__(self, max_depth: int = 2, max_pages: int = 100, same_domain: bool = True,
+                 allow_pattern: Optional[str] = None, deny_pattern: Optional[str] = None,
+                 seen_capacity: int = 1_000_000, seen_error_rate: float = 0.001):
+        """
+        初始化待抓取队列
+
+        Args:
+            max_depth (int): 最大抓取深度，起始URL深度为0
+            max_pages (int): 最多出队的页面数
+            same_domain (bool): 是否只抓取起始URL所在的域名
+            allow_pattern (Optional[str]): URL必须匹配的正则表达式
+            deny_pattern (Optional[str]): URL匹配时被排除的正则表达式
+            seen_capacity (int): 已见URL集合的预计容量
+            seen_error_rate (float): 已见URL集合的误判率
+        """
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.same_domain = same_domain
+        self.allow_re = re.compile(allow_pattern) if allow_pattern else None
+        self.deny_re = re.compile(deny_pattern) if deny_pattern else None
+        self.seen = BloomFilter(seen_capacity, seen_error_rate)
+        self.allowed_hosts: Set[str] = set()
+        self._heap: List[Tuple[int, int, str]] = []
+        self._counter = 0
+        self.popped = 0
+        # 新URL入队时的回调，参数为归一化后的URL和深度
+        self.on_add: Optional[Callable[[str, int], None]] = None
+
+    @staticmethod
+    def _site_host(url: str) -> str:
+        host = (urlparse(url).hostname or '').lower()
+        return host[4:] if host.startswith('www.') else host
+
+    def in_scope(self, url: str) -> bool:
+        """
+        判断URL是否在抓取范围内
+
+        Args:
+            url (str): 归一化后的URL
+
+        Returns:
+            bool: 是否在范围内
+        """
+        if urlparse(url).scheme not in ('http', 'https'):
+            return False
+        if self.same_domain and self._site_host(url) not in self.allowed_hosts:
+            return False
+        if self.allow_re and not self.allow_re.search(url):
+            return False
+        if self.deny_re and self.deny_re.search(url):
+            return False
+        return True
+
+    def add_seeds(self, urls: Iterable[str]):
+        """
+        添加起始URL，起始URL的域名决定同域范围
+
+        Args:
+            urls (Iterable[str]): 起始URL列表
+        """
+        urls = [normalize_url(url) for url in urls]
+        self.allowed_hosts.update(self._site_host(url) for url in urls)
+        for url in urls:
+            self.add(url, 0)
+
+    def add(self, url: str, depth: int) -> bool:
+        """
+        添加URL到队列
+
+        Args:
+            url (str): 要添加的URL
+            depth (int): URL所在深度
+
+        Returns:
+            bool: 是否新加入队列
+        """
+        if depth > self.max_depth:
+            return False
+        url = normalize_url(url)
+        if not self.in_scope(url) or not self.seen.add(url):
+            return False
+        self.push(url, depth)
+        if self.on_add is not None:
+            self.on_add(url, depth)
+        return True
+
+    def push(self, url: str, depth: int):
+        """
+        直接将URL放入队列，不做归一化、范围和去重检查，用于恢复已保存的队列
+
+        Args:
+            url (str): 归一化后的URL
+            depth (int): URL所在深度
+        """
+        heapq.heappush(self._heap, (depth, self._counter, url))
+        self._counter += 1
+
+    @property
+    def exhausted(self) -> bool:
+        """是否已达到最大页面数"""
+        return self.popped >= self.max_pages
+
+    def pop(self) -> Optional[Tuple[str, int]]:
+        """
+        取出下一个要抓取的URL
+
+        Returns:
+            Optional[Tuple[str, int]]: URL和深度，队列为空或已达上限时为None
+        """
+        if self.exhausted or not self._heap:
+            return None
+        depth, _, url = heapq.heappop(self._heap)
+        self.popped += 1
+        return url, depth
+
+    def __len__(self) -> int:
+        return len(self._heap)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+class ResponseCache:
+    """
+    基于SQLite的响应元数据缓存，用于增量重复抓取
+
+    按URL保存ETag、Last-Modified、正文哈希和页面链接。再次抓取时发送条件请求头，
+    服务器返回304或正文哈希不变时可以跳过解析和保存。
+    """
+
+    def __init__(self, path: str):
+        """
+        打开或创建缓存数据库
+
+        Args:
+            path (str): 数据库文件路径
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            ' url TEXT PRIMARY KEY,'
+            ' etag TEXT,'
+            ' last_modified TEXT,'
+            ' content_hash TEXT,'
+            ' links TEXT,'
+            ' updated_at REAL NOT NULL)'
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def hash_content(content: bytes) -> str:
+        """
+        计算响应正文的哈希
+
+        Args:
+            content (bytes): 响应正文
+
+        Returns:
+            str: 十六进制哈希值
+        """
+        return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+    def _get(self, url: str) -> Optional[Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]]:
+        with self._lock:
+            return self.conn.execute(
+                'SELECT etag, last_modified, content_hash, links FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """
+        生成条件请求头
+
+        Args:
+            url (str): 页面URL
+
+        Returns:
+            Dict[str, str]: If-None-Match/If-Modified-Since请求头，无缓存时为空
+        """
+        row = self._get(url)
+        headers = {}
+        if row:
+            etag, last_modified = row[0], row[1]
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def is_unchanged(self, url: str, content_hash: str) -> bool:
+        """
+        判断正文是否与上次抓取时相同
+
+        Args:
+            url (str): 页面URL
+            content_hash (str): 本次正文哈希
+
+        Returns:
+            bool: 是否未变化
+        """
+        row = self._get(url)
+        return bool(row) and row[2] == content_hash
+
+    def cached_links(self, url: str) -> List[str]:
+        """
+        获取上次抓取时记录的页面链接
+
+        Args:
+            url (str): 页面URL
+
+        Returns:
+            List[str]: 链接列表
+        """
+        row = self._get(url)
+        return row[3].split('\n') if row and row[3] else []
+
+    def update(self, url: str, etag: Optional[str], last_modified: Optional[str],
+               content_hash: Optional[str] = None, links: Optional[List[str]] = None):
+        """
+        更新URL的缓存记录，content_hash和links为None时保留原值
+
+        Args:
+            url (str): 页面URL
+            etag (Optional[str]): 响应头ETag
+            last_modified (Optional[str]): 响应头Last-Modified
+            content_hash (Optional[str]): 正文哈希
+            links (Optional[List[str]]): 页面链接
+        """
+        links_text = '\n'.join(links) if links is not None else None
+        with self._lock:
+            self.conn.execute(
+                'INSERT INTO responses (url, etag, last_modified, content_hash, links, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(url) DO UPDATE SET '
+                ' etag=COALESCE(excluded.etag, etag),'
+                ' last_modified=COALESCE(excluded.last_modified, last_modified),'
+                ' content_hash=COALESCE(excluded.content_hash, content_hash),'
+                ' links=COALESCE(excluded.links, links),'
+                ' updated_at=excluded.updated_at',
+                (url, etag, last_modified, content_hash, links_text, time.time())
+            )
+            self.conn.commit()
+
+    def close(self):
+        """
+        关闭数据库
+        """
+        with self._lock:
+            self.conn.close()
@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import os
 import argparse
 from rich.console import Console
 from rich.prompt import Prompt
 from crawler import WebCrawler
+from parsers import PARSER_BACKENDS
+from docx_writer import MERGE_MODES
 
 def main():
     console = Console()
@@ -12,14 +15,95 @@ def main():
     # 解析命令行参数
     parser = argparse.ArgumentParser(description='网页内容抓取工具')
     parser.add_argument('--url', help='要抓取的URL')
-    parser.add_argument('--format', choices=['txt', 'docx'], default='txt', help='保存格式')
+    parser.add_argument('--format', choices=['txt', 'docx', 'jsonl'], default='txt',
+                        help='保存格式，jsonl表示追加到输出目录下segments中的压缩分段文件')
     parser.add_argument('--output', default='downloaded_content', help='输出目录')
+    parser.add_argument('--url-file', help='批量抓取的URL列表文件，每行一个URL')
+    parser.add_argument('--concurrency', type=int, default=1, help='并发请求数，大于1时启用异步抓取')
+    parser.add_argument('--per-host', type=int, default=2, help='单个站点的最大并发请求数')
+    parser.add_argument('--min-interval', type=float, default=1.0, help='同一站点两次请求的最小间隔（秒）')
+    parser.add_argument('--max-interval', type=float, default=3.0, help='同一站点两次请求的最大间隔（秒）')
+    parser.add_argument('--respect-robots', action='store_true', help='遵守robots.txt中的Crawl-delay')
+    parser.add_argument('--depth', type=int, help='递归抓取的最大链接深度，设置后从起始URL按广度优先抓取')
+    parser.add_argument('--max-pages', type=int, default=100, help='递归抓取的最大页面数')
+    parser.add_argument('--allow', help='递归抓取时URL必须匹配的正则表达式')
+    parser.add_argument('--deny', help='递归抓取时需要排除的URL正则表达式')
+    parser.add_argument('--cross-domain', action='store_true', help='递归抓取时允许跟随其他域名的链接')
+    parser.add_argument('--state', help='批量/递归抓取的状态数据库路径，默认为输出目录下的 .crawl_state.db')
+    parser.add_argument('--resume', action='store_true', help='从上次中断的位置继续批量/递归抓取')
+    parser.add_argument('--incremental', action='store_true', help='增量抓取：使用条件请求，跳过未变化的页面')
+    parser.add_argument('--parser', choices=PARSER_BACKENDS, default='html.parser', help='HTML解析后端')
+    parser.add_argument('--parse-workers', type=int, default=0, help='并发抓取时的解析进程数，0表示在线程中解析')
+    parser.add_argument('--queue-size', type=int, default=100, help='并发抓取时抓取/解析/保存阶段之间的队列长度')
+    parser.add_argument('--max-size', type=float, default=10, help='单个页面的最大大小（MB），超过时放弃下载')
+    parser.add_argument('--segment-size', type=int, default=64, help='jsonl格式下单个分段文件的最大大小（MB）')
+    parser.add_argument('--docx-workers', type=int, default=1, help='后台生成DOCX的进程数，0表示在保存时直接生成')
+    parser.add_argument('--docx-merge', choices=MERGE_MODES, help='把多个页面合并到一个DOCX：batch按批次，domain按域名')
+    parser.add_argument('--docx-batch-size', type=int, default=100, help='合并时每个DOCX包含的页面数')
+    parser.add_argument('--dedup', action='store_true', help='跳过正文近似重复或规范URL已保存的页面')
+    parser.add_argument('--dedup-distance', type=int, default=3, help='SimHash指纹视为近似重复的最大汉明距离')
+    parser.add_argument('--metrics-json', help='批量/递归抓取结束时把吞吐量和分阶段耗时统计写入该JSON文件')
+    parser.add_argument('--metrics-prom', help='批量/递归抓取结束时把统计以Prometheus文本格式写入该文件')
+    parser.add_argument('--retries', type=int, default=2, help='超时、连接错误、429和5xx等临时错误的最大重试次数')
+    parser.add_argument('--breaker-threshold', type=int, default=5, help='站点连续失败多少次后暂停请求该站点')
+    parser.add_argument('--breaker-timeout', type=float, default=30, help='站点首次暂停请求的时长（秒），再次失败时加倍')
     args = parser.parse_args()
     
+    urls = []
+    if args.url_file:
+        with open(args.url_file, 'r', encoding='utf-8') as f:
+            urls = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    elif args.url:
+        urls = [args.url]
+        
+    # 批量和递归抓取时记录断点状态
+    state_file = None
+    if args.url_file or args.depth is not None:
+        state_file = args.state or os.path.join(args.output, '.crawl_state.db')
+        
     # 初始化爬虫
-    crawler = WebCrawler(save_dir=args.output)
+    crawler = WebCrawler(
+        save_dir=args.output,
+        min_interval=args.min_interval,
+        max_interval=max(args.min_interval, args.max_interval),
+        respect_robots=args.respect_robots,
+        state_file=state_file,
+        cache_file=os.path.join(args.output, '.http_cache.db') if args.incremental else None,
+        parser_backend=args.parser,
+        parse_workers=args.parse_workers,
+        queue_size=args.queue_size,
+        max_body_size=int(args.max_size * 1024 * 1024),
+        segment_size=args.segment_size * 1024 * 1024,
+        docx_workers=args.docx_workers,
+        docx_merge=args.docx_merge,
+        docx_batch_size=args.docx_batch_size,
+        dedup=args.dedup,
+        dedup_distance=args.dedup_distance,
+        metrics_json=args.metrics_json,
+        metrics_prom=args.metrics_prom,
+        max_retries=args.retries,
+        breaker_threshold=args.breaker_threshold,
+        breaker_timeout=args.breaker_timeout
+    )
     
-    if args.url:
+    if urls and args.depth is not None:
+        # 递归抓取模式
+        crawler.crawl_site(
+            urls,
+            args.format,
+            max_depth=args.depth,
+            max_pages=args.max_pages,
+            same_domain=not args.cross_domain,
+            allow_pattern=args.allow,
+            deny_pattern=args.deny,
+            concurrency=args.concurrency,
+            per_host_limit=args.per_host,
+            resume=args.resume
+        )
+    elif args.url_file:
+        # 批量模式
+        crawler.crawl_pages(urls, args.format, args.concurrency, args.per_host, resume=args.resume)
+    elif args.url:
         # 单个URL模式
         crawler.crawl_page(args.url, args.format)
     else:
@@ -33,22 +117,24 @@ def main():
                 
             format_choice = Prompt.ask(
                 "选择保存格式",
-                choices=['txt', 'docx'],
+                choices=['txt', 'docx', 'jsonl'],
                 default='txt'
             )
             
-            crawler.crawl_page(url, format_choice)
+            # 抓取页面的同时提取链接，避免重复请求
+            text, links = crawler.crawl_page_with_links(url, format_choice)
             
-            # 询问是否提取链接
-            if Prompt.ask("是否提取页面中的链接？", choices=['y', 'n']) == 'y':
-                links = crawler.extract_links(url)
+            # 询问是否显示链接
+            if text is not None and Prompt.ask("是否提取页面中的链接？", choices=['y', 'n']) == 'y':
                 if links:
                     console.print(f"\n[green]找到 {len(links)} 个链接：[/green]")
                     for i, link in enumerate(links, 1):
                         console.print(f"{i}. {link}")
                         
                     if Prompt.ask("是否抓取这些链接？", choices=['y', 'n']) == 'y':
-                        crawler.crawl_pages(links, format_choice)
+                        crawler.crawl_pages(links, format_choice, args.concurrency, args.per_host)
+                        
+    crawler.close()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
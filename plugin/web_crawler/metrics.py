@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import time
+import bisect
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+
+# 抓取各阶段：DNS解析、建立连接、首字节、下载正文、解析正文、提取链接、保存
+STAGES = ['dns', 'connect', 'ttfb', 'body', 'parse', 'extract', 'write']
+
+# 直方图桶上界（秒），与Prometheus默认桶一致
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    固定桶的延迟直方图，可估算分位数
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """
+        按桶内线性插值估算分位数，与Prometheus的histogram_quantile相同
+
+        Args:
+            q (float): 分位数，0~1
+
+        Returns:
+            float: 估算值（秒），没有样本时为0
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if cumulative + count >= rank and count:
+                if i == len(self.buckets):
+                    return self.max
+                lower = self.buckets[i - 1] if i else 0.0
+                return min(self.max, lower + (self.buckets[i] - lower) * (rank - cumulative) / count)
+            cumulative += count
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else 0.0,
+            'p50': round(self.quantile(0.5), 6),
+            'p95': round(self.quantile(0.95), 6),
+            'max': round(self.max, 6),
+            'buckets': {str(le): count for le, count in zip(self.buckets + ('+Inf',), self._cumulative())},
+        }
+
+    def _cumulative(self) -> List[int]:
+        total, result = 0, []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class CrawlMetrics:
+    """
+    抓取吞吐量和分阶段耗时统计
+
+    记录各阶段耗时直方图、每个站点的请求耗时直方图、页面数和字节数，以及最近一段时间的
+    滚动速率。统计可以导出为JSON摘要和Prometheus文本格式。
+    """
+
+    def __init__(self, window: float = 10.0):
+        """
+        初始化统计
+
+        Args:
+            window (float): 计算滚动速率的时间窗口（秒）
+        """
+        self.window = window
+        self.started_at = time.time()
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+        self.stages: Dict[str, Histogram] = {stage: Histogram() for stage in STAGES}
+        self.hosts: Dict[str, Histogram] = {}
+        self.host_bytes: Dict[str, int] = {}
+        self.pages = {'success': 0, 'failure': 0}
+        self.bytes = 0
+        self._recent: Deque[Tuple[float, int, int]] = deque()
+
+    def _trim(self, now: float):
+        while self._recent and now - self._recent[0][0] > self.window:
+            self._recent.popleft()
+
+    def observe(self, stage: str, seconds: float):
+        """
+        记录一个阶段的耗时
+
+        Args:
+            stage (str): 阶段名称，见STAGES
+            seconds (float): 耗时（秒）
+        """
+        with self._lock:
+            self.stages[stage].observe(seconds)
+
+    def observe_fetch(self, host: str, seconds: float, nbytes: int):
+        """
+        记录一次请求的总耗时（首字节加正文下载）和下载的字节数
+
+        Args:
+            host (str): 站点
+            seconds (float): 请求耗时（秒）
+            nbytes (int): 正文字节数
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.hosts.setdefault(host, Histogram()).observe(seconds)
+            self.host_bytes[host] = self.host_bytes.get(host, 0) + nbytes
+            self.bytes += nbytes
+            self._recent.append((now, 0, nbytes))
+            self._trim(now)
+
+    def page_done(self, ok: bool):
+        """
+        记录一个页面处理结束
+
+        Args:
+            ok (bool): 是否成功
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.pages['success' if ok else 'failure'] += 1
+            self._recent.append((now, 1, 0))
+            self._trim(now)
+
+    def rates(self) -> Tuple[float, float]:
+        """
+        计算最近时间窗口内的速率
+
+        Returns:
+            Tuple[float, float]: 每秒页面数和每秒字节数
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            span = min(self.window, max(now - self._start, 1e-6))
+            pages = sum(item[1] for item in self._recent)
+            nbytes = sum(item[2] for item in self._recent)
+        return pages / span, nbytes / span
+
+    def progress_text(self) -> str:
+        """
+        生成显示在进度条中的统计文本
+
+        Returns:
+            str: 滚动速率和请求耗时中位数
+        """
+        pages_per_second, bytes_per_second = self.rates()
+        with self._lock:
+            p50 = self.stages['ttfb'].quantile(0.5) + self.stages['body'].quantile(0.5)
+        return f"{pages_per_second:.1f} 页/秒  {bytes_per_second / 1024:.1f} KB/秒  请求中位数 {p50:.2f}s"
+
+    def summary(self) -> Dict:
+        """
+        生成统计摘要
+
+        Returns:
+            Dict: 可序列化为JSON的摘要
+        """
+        elapsed = time.monotonic() - self._start
+        pages_per_second, bytes_per_second = self.rates()
+        with self._lock:
+            total_pages = self.pages['success'] + self.pages['failure']
+            return {
+                'started_at': self.started_at,
+                'elapsed': round(elapsed, 3),
+                'pages': dict(self.pages),
+                'bytes': self.bytes,
+                'pages_per_second': round(total_pages / elapsed, 3) if elapsed > 0 else 0.0,
+                'bytes_per_second': round(self.bytes / elapsed, 3) if elapsed > 0 else 0.0,
+                'recent_pages_per_second': round(pages_per_second, 3),
+                'recent_bytes_per_second': round(bytes_per_second, 3),
+                'stages': {stage: hist.to_dict() for stage, hist in self.stages.items() if hist.count},
+                'hosts': {
+                    host: dict(hist.to_dict(), bytes=self.host_bytes.get(host, 0))
+                    for host, hist in sorted(self.hosts.items())
+                },
+            }
+
+    def write_json(self, path: str):
+        """
+        把统计摘要写入JSON文件
+
+        Args:
+            path (str): 文件路径
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def _histogram_lines(name: str, labels: str, hist: Histogram) -> List[str]:
+        prefix = f"{labels}," if labels else ''
+        lines = [
+            f'{name}_bucket{{{prefix}le="{le}"}} {count}'
+            for le, count in zip(tuple(str(b) for b in hist.buckets) + ('+Inf',), hist._cumulative())
+        ]
+        suffix = f"{{{labels}}}" if labels else ''
+        lines.append(f"{name}_sum{suffix} {hist.sum:.6f}")
+        lines.append(f"{name}_count{suffix} {hist.count}")
+        return lines
+
+    def to_prometheus(self) -> str:
+        """
+        导出为Prometheus文本格式
+
+        Returns:
+            str: 指标文本
+        """
+        with self._lock:
+            lines = [
+                '# HELP crawler_pages_total 已处理的页面数',
+                '# TYPE crawler_pages_total counter',
+            ]
+            lines += [f'crawler_pages_total{{result="{result}"}} {count}' for result, count in self.pages.items()]
+            lines += [
+                '# HELP crawler_bytes_total 下载的正文字节数',
+                '# TYPE crawler_bytes_total counter',
+                f'crawler_bytes_total {self.bytes}',
+                '# HELP crawler_stage_seconds 各抓取阶段的耗时',
+                '# TYPE crawler_stage_seconds histogram',
+            ]
+            for stage, hist in self.stages.items():
+                if hist.count:
+                    lines += self._histogram_lines('crawler_stage_seconds', f'stage="{stage}"', hist)
+            lines += [
+                '# HELP crawler_host_fetch_seconds 每个站点的请求耗时',
+                '# TYPE crawler_host_fetch_seconds histogram',
+            ]
+            for host, hist in sorted(self.hosts.items()):
+                lines += self._histogram_lines('crawler_host_fetch_seconds', f'host="{_escape_label(host)}"', hist)
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str):
+        """
+        把统计写入Prometheus文本格式文件，可供node_exporter的textfile收集器读取
+
+        Args:
+            path (str): 文件路径
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
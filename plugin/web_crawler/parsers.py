@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+from requests.compat import chardet
+
+try:
+    import lxml.html
+except ImportError:  # lxml为可选解析后端
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # selectolax为可选解析后端
+    LexborHTMLParser = None
+
+# 提取正文前移除的元素
+REMOVED_TAGS = frozenset(['script', 'style', 'nav', 'header', 'footer', 'aside'])
+
+# 常见的文章内容容器，按优先级排列
+CONTENT_SELECTORS = [
+    'article',
+    '.article-content',
+    '.article-body',
+    '.content',
+    '.main-content',
+    '#content',
+    '.post-content',
+    '.entry-content'
+]
+
+# 与CONTENT_SELECTORS对应的(标签名, class, id)匹配规则
+_CONTENT_RULES = [
+    ('article', None, None),
+    (None, 'article-content', None),
+    (None, 'article-body', None),
+    (None, 'content', None),
+    (None, 'main-content', None),
+    (None, None, 'content'),
+    (None, 'post-content', None),
+    (None, 'entry-content', None),
+]
+
+# 自动检测编码时只取正文开头的这部分字节，避免在大页面上全文检测
+DETECT_SAMPLE_SIZE = 64 * 1024
+
+# get_text默认只收集这两类字符串，不含注释、声明等
+_TEXT_STRING_TYPES = (NavigableString, CData)
+
+
+def is_valid_url(url: str) -> bool:
+    """
+    检查URL是否有效
+
+    Args:
+        url (str): 要检查的URL
+
+    Returns:
+        bool: URL是否有效
+    """
+    try:
+        result = urlparse(url)
+        return all([result.scheme, result.netloc])
+    except Exception:
+        return False
+
+
+def decode_content(content: bytes, encoding: Optional[str]) -> str:
+    """
+    按响应声明的编码解码页面，未声明或为ISO-8859-1时根据正文开头的一段字节检测编码
+
+    Args:
+        content (bytes): 响应体
+        encoding (Optional[str]): 响应头中声明的编码
+
+    Returns:
+        str: 解码后的文本
+    """
+    if not encoding or encoding.upper() == 'ISO-8859-1':
+        encoding = chardet.detect(content[:DETECT_SAMPLE_SIZE])['encoding'] or 'utf-8'
+    try:
+        return content.decode(encoding, errors='replace')
+    except LookupError:  # 检测出的编码名Python不支持
+        return content.decode('utf-8', errors='replace')
+
+
+def clean_text(text: str) -> str:
+    """
+    清理提取出的文本，过滤空行和单字符行
+
+    Args:
+        text (str): 原始文本
+
+    Returns:
+        str: 清理后的文本
+    """
+    lines = []
+    for line in text.split('\n'):
+        line = line.strip()
+        if line and len(line) > 1:
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+def _content_rank(name: str, classes, element_id: Optional[str]) -> int:
+    """
+    计算元素匹配的最高优先级内容选择器，未匹配时返回len(_CONTENT_RULES)
+    """
+    for rank, (rule_tag, rule_class, rule_id) in enumerate(_CONTENT_RULES):
+        if rule_tag is not None and name == rule_tag:
+            return rank
+        if rule_class is not None and classes and rule_class in classes:
+            return rank
+        if rule_id is not None and element_id == rule_id:
+            return rank
+    return len(_CONTENT_RULES)
+
+
+def _absolute_links(hrefs, url: str) -> List[str]:
+    links = []
+    for href in hrefs:
+        if href:
+            # 转换为绝对URL
+            absolute_url = urljoin(url, href)
+            if is_valid_url(absolute_url):
+                links.append(absolute_url)
+    # 去除重复链接，保留原有顺序
+    return list(dict.fromkeys(links))
+
+
+def _canonical_url(href: Optional[str], url: str) -> Optional[str]:
+    """
+    把<link rel=canonical>的href转换为绝对URL，无效时返回None
+    """
+    if not href:
+        return None
+    absolute_url = urljoin(url, href.strip())
+    return absolute_url if is_valid_url(absolute_url) else None
+
+
+def _is_canonical(rel) -> bool:
+    if isinstance(rel, str):
+        rel = rel.split()
+    return bool(rel) and 'canonical' in (value.lower() for value in rel)
+
+
+def _parse_bs4(html: str, url: str, with_links: bool, features: str) -> Tuple[str, List[str], Optional[str]]:
+    """
+    BeautifulSoup后端：一次遍历同时收集链接、规范URL和候选正文容器，再遍历一次容器收集文本
+    """
+    soup = BeautifulSoup(html, features)
+    no_match = len(_CONTENT_RULES)
+    firsts: List[Optional[Tag]] = [None] * no_match
+    hrefs = []
+    canonical = None
+
+    # 先序遍历，removed表示是否位于需要移除的元素内
+    stack = [(child, False) for child in reversed(soup.contents)]
+    while stack:
+        node, removed = stack.pop()
+        if not isinstance(node, Tag):
+            continue
+        name = node.name
+        if name == 'a' and with_links:
+            hrefs.append(node.get('href'))
+        elif name == 'link' and canonical is None and _is_canonical(node.get('rel')):
+            canonical = node.get('href')
+        removed = removed or name in REMOVED_TAGS
+        if not removed:
+            rank = _content_rank(name, node.get('class'), node.get('id'))
+            if rank < no_match and firsts[rank] is None:
+                firsts[rank] = node
+                # 不需要链接时，找到最高优先级的容器即可停止
+                if rank == 0 and not with_links:
+                    break
+        if removed and not with_links:
+            continue
+        stack.extend((child, removed) for child in reversed(node.contents))
+
+    container = next((node for node in firsts if node is not None), soup)
+
+    strings = []
+    stack = list(reversed(container.contents))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Tag):
+            if node.name not in REMOVED_TAGS:
+                stack.extend(reversed(node.contents))
+        elif type(node) in _TEXT_STRING_TYPES:
+            stripped = node.strip()
+            if stripped:
+                strings.append(stripped)
+
+    links = _absolute_links(hrefs, url) if with_links else []
+    return clean_text('\n'.join(strings)), links, _canonical_url(canonical, url)
+
+
+def _parse_lxml(html: str, url: str, with_links: bool) -> Tuple[str, List[str], Optional[str]]:
+    """
+    lxml后端：链接和移除元素由C实现的迭代器查找，再一次遍历找到正文容器
+    """
+    if not html.strip():
+        return '', [], None
+    parser = lxml.html.HTMLParser(encoding='utf-8')
+    root = lxml.html.document_fromstring(html.encode('utf-8'), parser=parser)
+
+    hrefs = [element.get('href') for element in root.iter('a')] if with_links else []
+    canonical = next((element.get('href') for element in root.iter('link') if _is_canonical(element.get('rel'))), None)
+
+    # drop_tree会保留元素后面的文本，与decompose一致
+    for element in list(root.iter(*REMOVED_TAGS)):
+        element.drop_tree()
+
+    no_match = len(_CONTENT_RULES)
+    best_rank, container = no_match, root
+    for element in root.iter():
+        if not isinstance(element.tag, str):
+            continue
+        classes = element.get('class')
+        rank = _content_rank(element.tag, classes.split() if classes else None, element.get('id'))
+        if rank < best_rank:
+            best_rank, container = rank, element
+            if rank == 0:
+                break
+
+    strings = [text.strip() for text in container.itertext()]
+    text = clean_text('\n'.join(text for text in strings if text))
+    return text, _absolute_links(hrefs, url), _canonical_url(canonical, url)
+
+
+def _parse_selectolax(html: str, url: str, with_links: bool) -> Tuple[str, List[str], Optional[str]]:
+    """
+    selectolax(lexbor)后端：所有内容选择器合并为一次CSS查询，再按优先级选出容器
+    """
+    tree = LexborHTMLParser(html)
+    hrefs = [node.attributes.get('href') for node in tree.css('a')] if with_links else []
+    canonical = next((node.attributes.get('href') for node in tree.css('link[rel]')
+                      if _is_canonical(node.attributes.get('rel'))), None)
+    tree.strip_tags(list(REMOVED_TAGS))
+
+    no_match = len(_CONTENT_RULES)
+    best_rank, container = no_match, tree.root
+    for node in tree.css(', '.join(CONTENT_SELECTORS)):
+        classes = node.attributes.get('class')
+        rank = _content_rank(node.tag, classes.split() if classes else None, node.attributes.get('id'))
+        if rank < best_rank:
+            best_rank, container = rank, node
+            if rank == 0:
+                break
+
+    text = container.text(separator='\n', strip=True) if container is not None else ''
+    return clean_text(text), _absolute_links(hrefs, url), _canonical_url(canonical, url)
+
+
+def _parse_html_parser(html: str, url: str, with_links: bool) -> Tuple[str, List[str], Optional[str]]:
+    return _parse_bs4(html, url, with_links, 'html.parser')
+
+
+_BACKENDS: Dict[str, Callable[[str, str, bool], Tuple[str, List[str], Optional[str]]]] = {
+    'html.parser': _parse_html_parser,
+}
+if lxml is not None:
+    _BACKENDS['lxml'] = _parse_lxml
+if LexborHTMLParser is not None:
+    _BACKENDS['selectolax'] = _parse_selectolax
+
+PARSER_BACKENDS = ['html.parser', 'lxml', 'selectolax']
+
+
+def available_backends() -> List[str]:
+    """
+    获取当前环境中可用的解析后端
+
+    Returns:
+        List[str]: 后端名称列表
+    """
+    return [name for name in PARSER_BACKENDS if name in _BACKENDS]
+
+
+def parse_page(html: str, url: str, backend: str = 'html.parser',
+               with_links: bool = False) -> Tuple[str, List[str], Optional[str]]:
+    """
+    解析页面，提取正文文本、链接和<link rel=canonical>声明的规范URL
+
+    Args:
+        html (str): 页面HTML
+        url (str): 页面URL，用于转换相对链接
+        backend (str): 解析后端，'html.parser'、'lxml'或'selectolax'
+        with_links (bool): 是否同时提取页面链接
+
+    Returns:
+        Tuple[str, List[str], Optional[str]]: 正文文本、链接列表和规范URL（未声明时为None）
+    """
+    if backend not in _BACKENDS:
+        raise ValueError(f"解析后端不可用: {backend}，可用的后端: {', '.join(available_backends())}")
+    return _BACKENDS[backend](html, url, with_links)
+
+
+def parse_document(content: bytes, encoding: Optional[str], url: str, backend: str = 'html.parser',
+                   with_links: bool = False) -> Tuple[str, List[str], Optional[str]]:
+    """
+    解码并解析响应正文，可在进程池中执行
+
+    Args:
+        content (bytes): 响应正文
+        encoding (Optional[str]): 响应头中声明的编码
+        url (str): 页面URL，用于转换相对链接
+        backend (str): 解析后端
+        with_links (bool): 是否同时提取页面链接
+
+    Returns:
+        Tuple[str, List[str], Optional[str]]: 正文文本、链接列表和规范URL
+    """
+    return parse_page(decode_content(content, encoding), url, backend, with_links)
+
+
+def parse_links(html: str, url: str, backend: str = 'html.parser') -> List[str]:
+    """
+    只提取页面中的链接
+
+    Args:
+        html (str): 页面HTML
+        url (str): 页面URL，用于转换相对链接
+        backend (str): 解析后端
+
+    Returns:
+        List[str]: 链接列表
+    """
+    if backend == 'lxml' and lxml is not None and html.strip():
+        parser = lxml.html.HTMLParser(encoding='utf-8')
+        root = lxml.html.document_fromstring(html.encode('utf-8'), parser=parser)
+        return _absolute_links((element.get('href') for element in root.iter('a')), url)
+    if backend == 'selectolax' and LexborHTMLParser is not None:
+        return _absolute_links((node.attributes.get('href') for node in LexborHTMLParser(html).css('a')), url)
+    soup = BeautifulSoup(html, 'html.parser')
+    return _absolute_links((link.get('href') for link in soup.find_all('a')), url)
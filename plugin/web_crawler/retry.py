@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+import requests
+
+try:
+    import aiohttp
+except ImportError:  # 异步模式为可选功能
+    aiohttp = None
+
+# 可以重试的HTTP状态码：请求超时、限流和服务端临时错误
+RETRYABLE_STATUS = frozenset([408, 425, 429, 500, 502, 503, 504])
+
+# 网络层面的临时错误
+_RETRYABLE_ERRORS: Tuple[type, ...] = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    asyncio.TimeoutError,
+    ConnectionError,
+)
+if aiohttp is not None:
+    _RETRYABLE_ERRORS += (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析Retry-After响应头，支持秒数和HTTP日期两种格式
+
+    Args:
+        value (Optional[str]): 响应头的值
+
+    Returns:
+        Optional[float]: 需要等待的秒数，无法解析时为None
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_error(error: Exception) -> Tuple[bool, Optional[int], Optional[float]]:
+    """
+    判断请求错误是否值得重试
+
+    Args:
+        error (Exception): 请求过程中抛出的异常
+
+    Returns:
+        Tuple[bool, Optional[int], Optional[float]]: 是否可重试、HTTP状态码和Retry-After秒数
+    """
+    status, headers = None, None
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status, headers = error.response.status_code, error.response.headers
+    elif aiohttp is not None and isinstance(error, aiohttp.ClientResponseError):
+        status, headers = error.status, error.headers
+
+    if status is not None:
+        retry_after = parse_retry_after(headers.get('Retry-After')) if headers else None
+        return status in RETRYABLE_STATUS, status, retry_after
+    return isinstance(error, _RETRYABLE_ERRORS), None, None
+
+
+class RetryPolicy:
+    """
+    指数退避重试策略
+
+    第n次重试前等待[0, base_delay * 2^n]之间的随机时间（全抖动），上限为max_delay；
+    服务器返回Retry-After时按其等待，超过max_retry_after则不再重试。
+    """
+
+    def __init__(self, max_retries: int = 2, base_delay: float = 1.0, max_delay: float = 60.0,
+                 max_retry_after: float = 300.0):
+        """
+        初始化重试策略
+
+        Args:
+            max_retries (int): 最大重试次数
+            base_delay (float): 退避的基础时间（秒）
+            max_delay (float): 退避时间上限（秒）
+            max_retry_after (float): 愿意遵守的最长Retry-After（秒）
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        计算下一次重试前的等待时间
+
+        Args:
+            attempt (int): 已经失败的次数减一，首次请求失败时为0
+            retry_after (Optional[float]): 服务器要求的等待秒数
+
+        Returns:
+            Optional[float]: 等待秒数，不再重试时为None
+        """
+        if attempt >= self.max_retries:
+            return None
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_retry_after else None
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    按主机的熔断器
+
+    主机连续失败达到阈值后熔断，熔断期间该主机的URL延后处理，不占用请求名额。
+    熔断时间结束后放行一个探测请求：成功则恢复，失败则熔断时间加倍。
+    连续熔断超过max_trips次的主机视为不可用，其余URL直接失败。
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, max_timeout: float = 600.0,
+                 max_trips: int = 4):
+        """
+        初始化熔断器
+
+        Args:
+            failure_threshold (int): 触发熔断的连续失败次数
+            reset_timeout (float): 首次熔断的时长（秒）
+            max_timeout (float): 熔断时长上限（秒）
+            max_trips (int): 放弃主机前允许的连续熔断次数
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_timeout = max_timeout
+        self.max_trips = max_trips
+        self._failures: Dict[str, int] = {}
+        self._open_until: Dict[str, float] = {}
+        self._timeouts: Dict[str, float] = {}
+        self._probing: Dict[str, bool] = {}
+        self._trips: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, host: str) -> float:
+        """
+        判断是否可以请求该主机
+
+        Args:
+            host (str): 主机
+
+        Returns:
+            float: 0表示可以请求，否则为建议延后的秒数
+        """
+        with self._lock:
+            open_until = self._open_until.get(host)
+            if open_until is None:
+                return 0.0
+            now = time.monotonic()
+            if now < open_until:
+                return open_until - now
+            # 熔断时间已过，只放行一个探测请求
+            if self._probing.get(host):
+                return min(self.reset_timeout, 5.0)
+            self._probing[host] = True
+            return 0.0
+
+    def record_success(self, host: str):
+        """
+        记录请求成功，关闭熔断
+
+        Args:
+            host (str): 主机
+        """
+        with self._lock:
+            self._failures.pop(host, None)
+            self._open_until.pop(host, None)
+            self._timeouts.pop(host, None)
+            self._probing.pop(host, None)
+            self._trips.pop(host, None)
+
+    def is_probing(self, host: str) -> bool:
+        """
+        主机是否有探测请求正在进行，在allow()放行后立即调用可判断本次请求是否为探测请求
+
+        Args:
+            host (str): 主机
+
+        Returns:
+            bool: 是否正在探测
+        """
+        with self._lock:
+            return self._probing.get(host, False)
+
+    def release_probe(self, host: str):
+        """
+        结束探测请求但不改变熔断状态，用于请求没有得出站点是否可用的结论时（例如被取消）；
+        已经记录过成功或失败的探测不受影响
+
+        Args:
+            host (str): 主机
+        """
+        with self._lock:
+            self._probing.pop(host, None)
+
+    def record_failure(self, host: str, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        记录请求失败，达到阈值、探测失败或服务器要求等待时熔断
+
+        Args:
+            host (str): 主机
+            retry_after (Optional[float]): 服务器通过Retry-After要求的等待秒数
+
+        Returns:
+            Optional[float]: 本次触发熔断时为熔断秒数，否则为None
+        """
+        with self._lock:
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            probing = self._probing.pop(host, False)
+            now = time.monotonic()
+            open_until = self._open_until.get(host, 0.0)
+            if not probing and open_until > now:
+                # 已经熔断，熔断前发出的请求失败不再重复计数
+                if retry_after is not None:
+                    self._open_until[host] = max(open_until, now + retry_after)
+                return None
+            if retry_after is None and not probing and failures < self.failure_threshold:
+                return None
+            if probing:
+                timeout = min(self.max_timeout, self._timeouts.get(host, self.reset_timeout) * 2)
+            else:
+                timeout = self._timeouts.get(host, self.reset_timeout)
+            if retry_after is not None:
+                timeout = max(timeout, retry_after) if failures >= self.failure_threshold else retry_after
+            self._timeouts[host] = timeout
+            self._open_until[host] = now + timeout
+            self._trips[host] = self._trips.get(host, 0) + 1
+            return timeout
+
+    def given_up(self, host: str) -> bool:
+        """
+        主机是否连续熔断次数过多，已被放弃
+
+        Args:
+            host (str): 主机
+
+        Returns:
+            bool: 是否已放弃
+        """
+        with self._lock:
+            return self._trips.get(host, 0) > self.max_trips
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+import random
+import asyncio
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+
+class HostScheduler:
+    """
+    按主机维护请求间隔的礼貌调度器
+
+    每个主机有独立的"下一次允许请求时间"，对同一主机的请求按顺序排队，
+    不同主机之间互不等待。
+    """
+
+    def __init__(self, min_interval: float = 1.0, max_interval: Optional[float] = None,
+                 respect_crawl_delay: bool = False):
+        """
+        初始化调度器
+
+        Args:
+            min_interval (float): 同一主机两次请求之间的最小间隔（秒）
+            max_interval (Optional[float]): 间隔上限，设置后在区间内随机取值
+            respect_crawl_delay (bool): 是否遵守robots.txt中的Crawl-delay
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.respect_crawl_delay = respect_crawl_delay
+        self._next_allowed: Dict[str, float] = {}
+        self._crawl_delays: Dict[str, Optional[float]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def interval_range(self) -> Tuple[float, float]:
+        """同一主机的请求间隔范围（秒）"""
+        return (self.min_interval, self.max_interval if self.max_interval is not None else self.min_interval)
+
+    @interval_range.setter
+    def interval_range(self, value: Tuple[float, float]):
+        self.min_interval, self.max_interval = value
+
+    @staticmethod
+    def get_host(url: str) -> str:
+        """
+        获取URL对应的主机键
+
+        Args:
+            url (str): 页面URL
+
+        Returns:
+            str: 小写的主机名（含端口）
+        """
+        return urlparse(url).netloc.lower()
+
+    def needs_robots(self, url: str) -> bool:
+        """
+        判断是否还需要为该主机加载robots.txt
+
+        Args:
+            url (str): 页面URL
+
+        Returns:
+            bool: 是否需要加载
+        """
+        return self.respect_crawl_delay and self.get_host(url) not in self._crawl_delays
+
+    def set_robots(self, url: str, robots_txt: Optional[str], user_agent: str = '*'):
+        """
+        解析robots.txt并记录该主机的Crawl-delay
+
+        Args:
+            url (str): 该主机下任意页面的URL
+            robots_txt (Optional[str]): robots.txt内容，获取失败时为None
+            user_agent (str): 匹配规则使用的User-Agent
+        """
+        delay = None
+        if robots_txt:
+            parser = RobotFileParser()
+            parser.parse(robots_txt.splitlines())
+            parser.modified()  # 未设置修改时间时crawl_delay总是返回None
+            delay = parser.crawl_delay(user_agent)
+        with self._lock:
+            self._crawl_delays[self.get_host(url)] = float(delay) if delay is not None else None
+
+    def _interval_for(self, host: str) -> float:
+        low, high = self.interval_range
+        interval = random.uniform(low, high) if high > low else low
+        crawl_delay = self._crawl_delays.get(host)
+        if self.respect_crawl_delay and crawl_delay:
+            interval = max(interval, crawl_delay)
+        return interval
+
+    def reserve(self, url: str) -> float:
+        """
+        为URL预约该主机的下一个请求时间
+
+        Args:
+            url (str): 要请求的URL
+
+        Returns:
+            float: 需要等待的秒数
+        """
+        host = self.get_host(url)
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_allowed.get(host, now))
+            self._next_allowed[host] = start + self._interval_for(host)
+        return start - now
+
+    def wait(self, url: str):
+        """
+        阻塞等待直到可以请求该URL
+
+        Args:
+            url (str): 要请求的URL
+        """
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self, url: str):
+        """
+        异步等待直到可以请求该URL
+
+        Args:
+            url (str): 要请求的URL
+        """
+        delay = self.reserve(url)
+        if delay > 0:
+            await asyncio.sleep(delay)
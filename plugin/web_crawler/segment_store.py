@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import gzip
+import json
+import zlib
+import time
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterator, List, Optional
+
+SEGMENT_PATTERN = re.compile(r'^segment-(\d{5})\.jsonl\.gz$')
+
+
+class SegmentStore:
+    """
+    分段压缩的页面存储
+
+    页面记录（URL、抓取时间、文本）按批写入gzip压缩的JSONL分段文件，
+    每批是一个独立的gzip成员，分段超过大小上限后切换到新文件。SQLite索引记录
+    每个URL所在的分段、批次偏移和批内行号，按URL查找时只需解压一个批次。
+    追加记录时可以附带回调，记录所在批次写入磁盘并更新索引后才调用。
+    """
+
+    def __init__(self, directory: str, segment_size: int = 64 * 1024 * 1024, batch_size: int = 100):
+        """
+        打开或创建存储目录，新写入的记录总是从新的分段开始
+
+        Args:
+            directory (str): 存储目录
+            segment_size (int): 单个分段文件的最大字节数（压缩后）
+            batch_size (int): 每累计多少条记录写入一次
+        """
+        self.directory = directory
+        self.segment_size = segment_size
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._batch: List[Dict] = []
+        self._callbacks: List[Callable[[], None]] = []
+
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.conn = sqlite3.connect(os.path.join(directory, 'index.db'), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS records ('
+            ' url TEXT PRIMARY KEY,'
+            ' segment TEXT NOT NULL,'
+            ' offset INTEGER NOT NULL,'
+            ' line INTEGER NOT NULL,'
+            ' fetched_at REAL NOT NULL)'
+        )
+        self.conn.commit()
+
+        # 上次运行的最后一个分段可能以不完整的批次结尾，因此不再追加
+        numbers = [int(match.group(1)) for match in map(SEGMENT_PATTERN.match, os.listdir(directory)) if match]
+        self._segment_number = max(numbers) + 1 if numbers else 0
+        self._segment = None
+
+    @staticmethod
+    def _segment_name(number: int) -> str:
+        return f"segment-{number:05d}.jsonl.gz"
+
+    @property
+    def current_segment(self) -> str:
+        """当前写入的分段文件名"""
+        return self._segment_name(self._segment_number)
+
+    def append(self, url: str, text: str, fetched_at: Optional[float] = None,
+               on_written: Optional[Callable[[], None]] = None) -> str:
+        """
+        追加一条页面记录，累计满一批时写入磁盘
+
+        Args:
+            url (str): 页面URL
+            text (str): 提取的文本内容
+            fetched_at (Optional[float]): 抓取时间戳，默认为当前时间
+            on_written (Optional[Callable[[], None]]): 记录所在批次写入磁盘后调用的回调
+
+        Returns:
+            str: 记录所在的分段文件名
+        """
+        record = {
+            'url': url,
+            'fetched_at': fetched_at if fetched_at is not None else time.time(),
+            'text': text,
+        }
+        with self._lock:
+            self._batch.append(record)
+            if on_written is not None:
+                self._callbacks.append(on_written)
+            segment = self.current_segment
+            if len(self._batch) >= self.batch_size:
+                self._write_batch()
+            return segment
+
+    def _write_batch(self):
+        """
+        把当前批次压缩为一个gzip成员追加到分段文件，更新索引后调用批次中记录的回调（调用方需持有锁）
+        """
+        if not self._batch:
+            return
+        if self._segment is None:
+            self._segment = open(os.path.join(self.directory, self.current_segment), 'ab')
+
+        payload = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in self._batch)
+        offset = self._segment.tell()
+        self._segment.write(gzip.compress(payload.encode('utf-8')))
+        self._segment.flush()
+
+        segment = self.current_segment
+        self.conn.executemany(
+            'INSERT OR REPLACE INTO records (url, segment, offset, line, fetched_at) VALUES (?, ?, ?, ?, ?)',
+            [(record['url'], segment, offset, line, record['fetched_at']) for line, record in enumerate(self._batch)]
+        )
+        self.conn.commit()
+        self._batch = []
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+        # 分段达到大小上限后切换到新文件
+        if self._segment.tell() >= self.segment_size:
+            self._segment.close()
+            self._segment = None
+            self._segment_number += 1
+
+    @staticmethod
+    def _read_member(path: str, offset: int) -> List[str]:
+        """
+        从分段文件的指定偏移读取一个gzip成员
+        """
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            data = bytearray()
+            while not decompressor.eof:
+                chunk = f.read(64 * 1024)
+                if not chunk:
+                    break
+                data.extend(decompressor.decompress(chunk))
+        return data.decode('utf-8').splitlines()
+
+    def get(self, url: str) -> Optional[Dict]:
+        """
+        按URL查找记录
+
+        Args:
+            url (str): 页面URL
+
+        Returns:
+            Optional[Dict]: 记录，包含url、fetched_at和text，不存在时为None
+        """
+        with self._lock:
+            for record in reversed(self._batch):
+                if record['url'] == url:
+                    return dict(record)
+            row = self.conn.execute(
+                'SELECT segment, offset, line FROM records WHERE url = ?', (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        segment, offset, line = row
+        return json.loads(self._read_member(os.path.join(self.directory, segment), offset)[line])
+
+    def __iter__(self) -> Iterator[Dict]:
+        """
+        按写入顺序遍历所有已写入磁盘的记录，同一URL可能出现多次
+        """
+        names = sorted(name for name in os.listdir(self.directory) if SEGMENT_PATTERN.match(name))
+        for name in names:
+            with gzip.open(os.path.join(self.directory, name), 'rt', encoding='utf-8') as f:
+                for line in f:
+                    yield json.loads(line)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+
+    def flush(self):
+        """
+        写入尚未写入磁盘的记录
+        """
+        with self._lock:
+            self._write_batch()
+
+    def close(self):
+        """
+        写入剩余记录并关闭分段文件和索引
+        """
+        with self._lock:
+            self._write_batch()
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+            self.conn.close()
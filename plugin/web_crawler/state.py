@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+from frontier import URLFrontier
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class CrawlState:
+    """
+    基于SQLite的抓取状态存储
+
+    记录每个URL的状态（pending/done/failed）、深度、重试次数和最后一次错误，
+    用于中断后从上次停止的位置继续抓取。写入按批次提交，减少磁盘同步次数。
+    """
+
+    def __init__(self, path: str, commit_interval: int = 100):
+        """
+        打开或创建状态数据库
+
+        Args:
+            path (str): 数据库文件路径
+            commit_interval (int): 每累计多少次状态更新提交一次
+        """
+        self.path = path
+        self.commit_interval = commit_interval
+        self._pending_writes = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS urls ('
+            ' url TEXT PRIMARY KEY,'
+            ' depth INTEGER NOT NULL DEFAULT 0,'
+            ' status TEXT NOT NULL,'
+            ' retries INTEGER NOT NULL DEFAULT 0,'
+            ' last_error TEXT,'
+            ' updated_at REAL NOT NULL)'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_urls_status ON urls(status)')
+        self.conn.commit()
+
+    def _write(self, sql: str, params: Tuple = ()):
+        with self._lock:
+            self.conn.execute(sql, params)
+            self._pending_writes += 1
+            if self._pending_writes >= self.commit_interval:
+                self.conn.commit()
+                self._pending_writes = 0
+
+    def reset(self):
+        """
+        清空所有状态，开始新的抓取
+        """
+        with self._lock:
+            self.conn.execute('DELETE FROM urls')
+            self.conn.commit()
+            self._pending_writes = 0
+
+    def add_pending(self, url: str, depth: int = 0):
+        """
+        记录待抓取的URL，已存在的URL保持原状态
+
+        Args:
+            url (str): URL
+            depth (int): 链接深度
+        """
+        self._write(
+            'INSERT OR IGNORE INTO urls (url, depth, status, updated_at) VALUES (?, ?, ?, ?)',
+            (url, depth, PENDING, time.time())
+        )
+
+    def mark_done(self, url: str):
+        """
+        标记URL抓取成功
+
+        Args:
+            url (str): URL
+        """
+        self._write(
+            'INSERT INTO urls (url, status, updated_at) VALUES (?, ?, ?) '
+            'ON CONFLICT(url) DO UPDATE SET status=excluded.status, last_error=NULL, updated_at=excluded.updated_at',
+            (url, DONE, time.time())
+        )
+
+    def mark_failed(self, url: str, error: str):
+        """
+        标记URL抓取失败并累计重试次数
+
+        Args:
+            url (str): URL
+            error (str): 错误信息
+        """
+        self._write(
+            'INSERT INTO urls (url, status, retries, last_error, updated_at) VALUES (?, ?, 1, ?, ?) '
+            'ON CONFLICT(url) DO UPDATE SET status=excluded.status, retries=retries+1, '
+            'last_error=excluded.last_error, updated_at=excluded.updated_at',
+            (url, FAILED, error, time.time())
+        )
+
+    def finished_urls(self, max_retries: int) -> Set[str]:
+        """
+        获取续抓时应跳过的URL：已成功的，以及失败次数达到上限的
+
+        Args:
+            max_retries (int): 失败URL的最大尝试次数
+
+        Returns:
+            Set[str]: 应跳过的URL集合
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT url FROM urls WHERE status = ? OR (status = ? AND retries >= ?)',
+                (DONE, FAILED, max_retries)
+            )
+            return {row[0] for row in rows}
+
+    def restore_frontier(self, frontier: URLFrontier, max_retries: int):
+        """
+        用已保存的状态恢复待抓取队列：重建已见URL集合，
+        未完成和可重试的URL重新入队，已处理的页面计入页面数上限
+
+        Args:
+            frontier (URLFrontier): 新建的待抓取队列
+            max_retries (int): 失败URL的最大尝试次数
+        """
+        with self._lock:
+            rows = self.conn.execute('SELECT url, depth, status, retries FROM urls')
+            for url, depth, status, retries in rows:
+                frontier.seen.add(url)
+                if status == DONE or (status == FAILED and retries >= max_retries):
+                    frontier.popped += 1
+                else:
+                    frontier.push(url, depth)
+
+    def counts(self) -> Dict[str, int]:
+        """
+        统计各状态的URL数量
+
+        Returns:
+            Dict[str, int]: 状态到数量的映射
+        """
+        with self._lock:
+            rows = self.conn.execute('SELECT status, COUNT(*) FROM urls GROUP BY status')
+            return {status: count for status, count in rows}
+
+    def failed(self) -> List[Tuple[str, int, Optional[str]]]:
+        """
+        获取失败的URL
+
+        Returns:
+            List[Tuple[str, int, Optional[str]]]: URL、重试次数和最后一次错误
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT url, retries, last_error FROM urls WHERE status = ? ORDER BY url', (FAILED,)
+            )
+            return list(rows)
+
+    def flush(self):
+        """
+        提交尚未写入磁盘的状态
+        """
+        with self._lock:
+            self.conn.commit()
+            self._pending_writes = 0
+
+    def close(self):
+        """
+        提交并关闭数据库
+        """
+        self.flush()
+        self.conn.close()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler import WebCrawler
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    """站点不可用时所有请求返回503，恢复后返回简单的HTML页面"""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.requests += 1
+        if not server.healthy:
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = f'<html><body><p>page {self.path}</p></body></html>'.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def site():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SiteHandler)
+    server.healthy = False
+    server.requests = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_given_up_host_is_retried_in_next_crawl(site, tmp_path):
+    base = f'http://127.0.0.1:{site.server_address[1]}'
+    urls = [f'{base}/page/{i}' for i in range(8)]
+    with WebCrawler(str(tmp_path), 0, 0, max_retries=0, breaker_threshold=1, breaker_timeout=0.01) as crawler:
+        crawler.crawl_pages(urls)
+        host = crawler.scheduler.get_host(urls[0])
+        assert crawler.breaker.given_up(host)
+        assert crawler.metrics.pages == {'success': 0, 'failure': len(urls)}
+
+        # 站点恢复后，同一个爬虫的下一次抓取重新请求该站点
+        site.healthy = True
+        site.requests = 0
+        crawler.crawl_pages(urls)
+        assert site.requests == len(urls)
+        assert crawler.metrics.pages == {'success': len(urls), 'failure': 0}
+
+        site.healthy = False
+        crawler.crawl_pages(urls)
+        assert crawler.breaker.given_up(host)
+        site.healthy = True
+        results = crawler.crawl_site(urls[:1], max_depth=0)
+        assert results == {urls[0]: True}
+
+
+def test_jsonl_page_is_written_when_crawl_page_returns(site, tmp_path):
+    site.healthy = True
+    url = f'http://127.0.0.1:{site.server_address[1]}/page/0'
+    with WebCrawler(str(tmp_path), 0, 0) as crawler:
+        assert crawler.crawl_page(url, 'jsonl')
+        assert crawler.metrics.pages == {'success': 1, 'failure': 0}
+        assert crawler.store.get(url)['text'] == 'page /page/0'
@@ -0,0 +1,123 @@
+import os
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional, Set
+
+class AssetCache:
+    """
+    本地素材缓存
+
+    素材按键（例如 Pexels 的视频ID和文件ID）保存，同一个键只下载一次。缓存记录每个文件
+    的大小，文件缺失或大小不符时视为未缓存。缓存总大小超过上限时，按最近使用时间
+    删除最久未使用的素材，本次运行中用到的素材不会被删除。
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int = 50 * 1024 ** 3):
+        """
+        :param cache_dir: 缓存目录
+        :param max_bytes: 缓存总大小上限（字节）
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._conn = sqlite3.connect(str(self.cache_dir / ".assets.db"), check_same_thread=False)
+        self._lock = threading.Lock()
+        self._in_use: Set[str] = set()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS assets ("
+                "key TEXT PRIMARY KEY, name TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+
+    def path_for(self, key: str, ext: str = '.mp4') -> Path:
+        """缓存中素材的文件路径"""
+        return self.cache_dir / f"{key}{ext}"
+
+    def get(self, key: str, expected_size: Optional[int] = None) -> Optional[Path]:
+        """
+        查询缓存的素材
+        :param key: 素材的键
+        :param expected_size: 素材应有的大小，已知时同时检查
+        :return: 文件路径，未缓存或文件不完整时为None
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT name, size FROM assets WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        path = self.cache_dir / row[0]
+        try:
+            size = path.stat().st_size
+        except OSError:
+            size = None
+        if size != row[1] or (expected_size is not None and size != expected_size):
+            self.discard(key)
+            return None
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE assets SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._in_use.add(key)
+        return path
+
+    def put(self, key: str, source: Path, ext: str = '.mp4') -> Path:
+        """
+        把下载完成的文件移入缓存，必要时删除最久未使用的素材
+        :param key: 素材的键
+        :param source: 下载完成的文件，与缓存目录位于同一文件系统
+        :param ext: 文件扩展名
+        :return: 缓存中的文件路径
+        """
+        path = self.path_for(key, ext)
+        os.replace(source, path)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO assets (key, name, size, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, path.name, path.stat().st_size, now, now)
+            )
+            self._in_use.add(key)
+        self.evict()
+        return path
+
+    def discard(self, key: str):
+        """删除缓存的素材"""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT name FROM assets WHERE key = ?", (key,)).fetchone()
+            self._conn.execute("DELETE FROM assets WHERE key = ?", (key,))
+            self._in_use.discard(key)
+        if row is not None:
+            (self.cache_dir / row[0]).unlink(missing_ok=True)
+
+    def total_size(self) -> int:
+        """缓存中素材的总大小（字节）"""
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM assets").fetchone()[0]
+
+    def evict(self) -> int:
+        """
+        删除最久未使用的素材，直到总大小不超过上限
+        :return: 删除的素材数
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT key, name, size FROM assets ORDER BY last_used").fetchall()
+            total = sum(row[2] for row in rows)
+            victims = []
+            for key, name, size in rows:
+                if total <= self.max_bytes:
+                    break
+                if key in self._in_use:
+                    continue
+                victims.append((key, name))
+                total -= size
+            with self._conn:
+                self._conn.executemany("DELETE FROM assets WHERE key = ?", [(key,) for key, _ in victims])
+        for key, name in victims:
+            (self.cache_dir / name).unlink(missing_ok=True)
+        if victims:
+            print(f"缓存超过上限，已删除 {len(victims)} 个最久未使用的素材")
+        return len(victims)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,180 @@
+import json
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+DEFAULT_API_BASE = 'https://api.pexels.com'
+
+# Pexels 搜索接口每页最多返回的视频数
+MAX_PER_PAGE = 80
+
+def best_rendition(video_files: List[Dict], min_width: int = 3840, min_height: int = 2160) -> Optional[Dict]:
+    """
+    选出分辨率不低于要求的最高质量视频文件
+    :param video_files: Pexels 返回的 video_files 列表
+    :param min_width: 最小宽度
+    :param min_height: 最小高度
+    :return: 视频文件，没有符合要求的文件时为None
+    """
+    best = None
+    for file in video_files:
+        width, height = file.get('width') or 0, file.get('height') or 0
+        if width >= min_width and height >= min_height and (best is None or height > best['height']):
+            best = file
+    return best
+
+class PexelsSearch:
+    """
+    带缓存的 Pexels 视频搜索
+
+    搜索结果按页获取，直到找到足够多符合分辨率要求的视频。每页的响应保存在本地缓存中，
+    有效期内不再请求API；每个查询符合要求的视频文件另外保存为索引，索引中的视频足够时
+    直接使用，不需要读取任何一页。
+    """
+
+    def __init__(self, api_key: str, db_path: Path, ttl: float = 24 * 3600, api_base: str = DEFAULT_API_BASE,
+                 session: Optional[requests.Session] = None):
+        """
+        :param api_key: Pexels API Key
+        :param db_path: 缓存数据库路径
+        :param ttl: 缓存的有效期（秒）
+        :param api_base: API地址，测试时可以指向本地服务
+        :param session: 发送请求使用的会话
+        """
+        self.headers = {'Authorization': api_key}
+        self.ttl = ttl
+        self.api_base = api_base.rstrip('/')
+        self.session = session or requests.Session()
+        self.api_requests = 0
+        self.cached_pages = 0
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, body TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS renditions ("
+                "search TEXT NOT NULL, position INTEGER NOT NULL, video_id INTEGER NOT NULL, file_id INTEGER, "
+                "width INTEGER, height INTEGER, duration REAL, link TEXT NOT NULL, PRIMARY KEY (search, position))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS scans ("
+                "search TEXT PRIMARY KEY, next_page INTEGER NOT NULL, exhausted INTEGER NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def search_page(self, query: str, page: int, per_page: int = MAX_PER_PAGE,
+                    orientation: str = 'landscape') -> Dict:
+        """
+        获取一页搜索结果，有效期内的缓存直接使用
+        :param query: 搜索关键词
+        :param page: 页码，从1开始
+        :param per_page: 每页视频数
+        :param orientation: 视频方向
+        :return: API返回的JSON
+        """
+        key = json.dumps([query, page, per_page, orientation], ensure_ascii=False)
+        with self._lock:
+            row = self._conn.execute("SELECT body, fetched_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is not None and time.time() - row[1] < self.ttl:
+            self.cached_pages += 1
+            return json.loads(row[0])
+
+        response = self.session.get(
+            f"{self.api_base}/videos/search",
+            params={'query': query, 'per_page': per_page, 'page': page, 'orientation': orientation},
+            headers=self.headers,
+            timeout=30
+        )
+        self.api_requests += 1
+        if response.status_code != 200:
+            raise Exception(f"Pexels API请求失败: {response.status_code}")
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, body, fetched_at) VALUES (?, ?, ?)",
+                (key, response.text, time.time())
+            )
+        return response.json()
+
+    def find_videos(self, query: str, count: int, per_page: int = MAX_PER_PAGE, max_pages: int = 10,
+                    min_width: int = 3840, min_height: int = 2160,
+                    orientation: str = 'landscape') -> List[Tuple[Dict, Dict]]:
+        """
+        查找符合分辨率要求的视频，不够时继续读取下一页
+        :param query: 搜索关键词
+        :param count: 需要的视频数
+        :param per_page: 每页视频数
+        :param max_pages: 本次最多读取的页数
+        :param min_width: 最小宽度
+        :param min_height: 最小高度
+        :param orientation: 视频方向
+        :return: (视频, 视频文件) 列表，视频包含 id 和 duration，视频文件包含 id、width、height 和 link
+        """
+        search = json.dumps([query, per_page, orientation, min_width, min_height], ensure_ascii=False)
+        with self._lock, self._conn:
+            scan = self._conn.execute(
+                "SELECT next_page, exhausted, updated_at FROM scans WHERE search = ?", (search,)
+            ).fetchone()
+            if scan is not None and time.time() - scan[2] >= self.ttl:
+                # 索引已过期，重新搜索
+                self._conn.execute("DELETE FROM renditions WHERE search = ?", (search,))
+                self._conn.execute("DELETE FROM scans WHERE search = ?", (search,))
+                scan = None
+            rows = self._conn.execute(
+                "SELECT video_id, file_id, width, height, duration, link FROM renditions "
+                "WHERE search = ? ORDER BY position", (search,)
+            ).fetchall()
+
+        videos = [({'id': row[0], 'duration': row[4]},
+                   {'id': row[1], 'width': row[2], 'height': row[3], 'link': row[5]}) for row in rows]
+        seen = {video['id'] for video, _ in videos}
+        page, exhausted = (scan[0], bool(scan[1])) if scan is not None else (1, False)
+        pages_read = skipped = 0
+
+        while len(videos) < count and not exhausted and pages_read < max_pages:
+            data = self.search_page(query, page, per_page, orientation)
+            pages_read += 1
+            found = []
+            for video in data.get('videos') or []:
+                video_file = best_rendition(video.get('video_files') or [], min_width, min_height)
+                if video_file is None:
+                    skipped += 1
+                    continue
+                if video['id'] in seen:
+                    continue
+                seen.add(video['id'])
+                found.append(({'id': video['id'], 'duration': video.get('duration')}, {
+                    'id': video_file.get('id'), 'width': video_file['width'],
+                    'height': video_file['height'], 'link': video_file['link'],
+                }))
+            exhausted = not data.get('videos') or not data.get('next_page')
+            page += 1
+
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO renditions "
+                    "(search, position, video_id, file_id, width, height, duration, link) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(search, len(videos) + i, video['id'], file['id'], file['width'], file['height'],
+                      video['duration'], file['link']) for i, (video, file) in enumerate(found)]
+                )
+                # 索引的有效期从第一次搜索开始计算
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO scans (search, next_page, exhausted, updated_at) VALUES (?, ?, ?, "
+                    "COALESCE((SELECT updated_at FROM scans WHERE search = ?), ?))",
+                    (search, page, int(exhausted), search, time.time())
+                )
+            videos.extend(found)
+
+        if pages_read:
+            print(f"读取了 {pages_read} 页搜索结果，跳过 {skipped} 个分辨率不足的视频")
+        if len(videos) < count:
+            print(f"警告: 只找到 {len(videos)} 个符合要求的视频，少于需要的 {count} 个")
+        return videos[:count]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,19 +1,95 @@
 import os
 import sys
-import time
+import argparse
+import subprocess
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
 import yt_dlp
 from moviepy.editor import VideoFileClip, AudioFileClip, concatenate_videoclips, vfx
+from moviepy.config import get_setting
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
 from dotenv import load_dotenv
 import random
 import json
+from asset_cache import AssetCache
+from pexels_search import DEFAULT_API_BASE, MAX_PER_PAGE, PexelsSearch, best_rendition
 
 # 加载环境变量
 load_dotenv()
 
+# 下载视频时每次读取和写入的块大小
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# 编码配置：输出分辨率、帧率、libx264预设、码率和其他编码参数，所有渲染方式共用
+#   draft     低分辨率草稿，几分钟内完成，用于检查片段选择
+#   preview   720p 快速预览
+#   standard  4K 60fps，编码速度和质量兼顾
+#   archival  4K 60fps，最慢但质量最好
+ENCODING_PROFILES = {
+    'draft': {
+        'size': (640, 360),
+        'fps': 30,
+        'preset': 'ultrafast',
+        'bitrate': '1500k',
+        'x264_params': [],
+    },
+    'preview': {
+        'size': (1280, 720),
+        'fps': 30,
+        'preset': 'fast',
+        'bitrate': '5000k',
+        'x264_params': ['-profile:v', 'high'],
+    },
+    'standard': {
+        'size': (3840, 2160),
+        'fps': 60,
+        'preset': 'slow',
+        'bitrate': '30000k',
+        'x264_params': ['-g', '250', '-profile:v', 'high', '-level', '5.2'],
+    },
+    'archival': {
+        'size': (3840, 2160),
+        'fps': 60,
+        'preset': 'veryslow',  # 最慢但质量最好的编码预设
+        'bitrate': '50000k',  # 更高的比特率
+        'x264_params': [
+            '-refs', '6',
+            '-me_method', 'umh',
+            '-subq', '8',
+            '-trellis', '2',
+            '-fast-pskip', '0',
+            '-8x8dct', '1',
+            '-weightb', '1',
+            '-g', '250',  # 关键帧间隔
+            '-sc_threshold', '40',  # 场景切换阈值
+            '-rc-lookahead', '60',
+            '-aq-mode', '3',
+            '-aq-strength', '0.8',
+            '-psy-rd', '1.0,0.0',
+            '-profile:v', 'high',
+            '-level', '5.2'
+        ],
+    },
+}
+DEFAULT_PROFILE = 'archival'
+
+# 与enhance_video_quality效果相同的FFmpeg滤镜：colorx(1.2)把RGB乘以1.2，
+# lum_contrast(lum=1.1, contrast=1.1)计算 x + 1.1 + 1.1 * (x - 127)，即以中灰为中心放大2.1倍，
+# 两步分别换算为YUV中的对比度、亮度和饱和度
+ENHANCE_FILTER = 'eq=contrast=1.2:brightness=0.1:saturation=1.2,eq=contrast=2.1:brightness=0.0043:saturation=2.1'
+
+# 背景音乐音量
+MUSIC_VOLUME = 0.3
+
 class VideoCreator:
-    def __init__(self):
+    def __init__(self, download_workers=4, cache_size_gb=50, search_ttl_hours=24):
+        """
+        :param download_workers: 同时下载的视频片段数
+        :param cache_size_gb: 视频片段缓存的大小上限（GB），超过时删除最久未使用的片段
+        :param search_ttl_hours: Pexels 搜索结果缓存的有效期（小时）
+        """
         self.current_dir = Path(__file__).parent
         self.downloads_dir = self.current_dir / "downloads"
         self.temp_dir = self.current_dir / "temp"
@@ -31,54 +107,69 @@ class VideoCreator:
         self.headers = {
             'Authorization': self.pexels_api_key
         }
+        
+        # 下载的视频片段按Pexels视频ID和文件ID缓存在downloads目录中
+        self.cache = AssetCache(self.downloads_dir, int(cache_size_gb * 1024 ** 3))
+        self.download_workers = download_workers
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=download_workers, pool_maxsize=download_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # 搜索结果和每个查询的4K视频索引缓存在本地，PEXELS_API_BASE可指向本地测试服务
+        self.search = PexelsSearch(
+            self.pexels_api_key,
+            self.downloads_dir / ".pexels_search.db",
+            ttl=search_ttl_hours * 3600,
+            api_base=os.getenv('PEXELS_API_BASE', DEFAULT_API_BASE),
+            session=self.session
+        )
     
     def get_highest_quality_video(self, video_files):
         """获取最高质量的视频文件"""
-        highest_quality = None
-        max_height = 0
-        
-        for file in video_files:
-            # 只选择4K及以上分辨率的视频
-            if file['height'] >= 2160 and file['width'] >= 3840:
-                if file['height'] > max_height:
-                    max_height = file['height']
-                    highest_quality = file
-        
-        return highest_quality
-    
-    def download_pexels_video(self, query, per_page=20):
-        """从Pexels下载视频"""
-        url = f"https://api.pexels.com/videos/search?query={query}&per_page={per_page}&orientation=landscape"
-        response = requests.get(url, headers=self.headers)
-        
-        if response.status_code != 200:
-            raise Exception(f"Pexels API请求失败: {response.status_code}")
-        
-        videos = response.json()['videos']
-        downloaded_files = []
-        
-        for video in videos:
-            # 获取最高质量的视频文件
-            video_file = self.get_highest_quality_video(video['video_files'])
-            if not video_file:
-                print(f"跳过视频 {video['id']}: 分辨率不足4K")
-                continue
-                
-            video_url = video_file['link']
-            video_id = video['id']
-            output_path = self.downloads_dir / f"{video_id}.mp4"
-            
-            print(f"正在下载视频: {video_id} (分辨率: {video_file['width']}x{video_file['height']})")
-            response = requests.get(video_url, stream=True)
-            with open(output_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
+        # 只选择4K及以上分辨率的视频
+        return best_rendition(video_files, 3840, 2160)
+    
+    def download_clip(self, video, video_file):
+        """下载一个视频片段，已缓存的片段直接使用"""
+        key = f"{video['id']}_{video_file['id']}"
+        cached = self.cache.get(key)
+        if cached is not None:
+            print(f"使用缓存的视频: {video['id']}")
+            return cached
+        
+        print(f"正在下载视频: {video['id']} (分辨率: {video_file['width']}x{video_file['height']})")
+        partial_path = self.downloads_dir / f"{key}.mp4.part"
+        try:
+            with self.session.get(video_file['link'], stream=True, timeout=(10, 60)) as response:
+                response.raise_for_status()
+                expected_size = int(response.headers.get('Content-Length') or 0)
+                size = 0
+                with open(partial_path, 'wb', buffering=4 * DOWNLOAD_CHUNK_SIZE) as f:
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
                         f.write(chunk)
-            
-            downloaded_files.append(output_path)
-            time.sleep(1)  # 避免请求过于频繁
+                        size += len(chunk)
+            # 检查文件是否完整
+            if expected_size and size != expected_size:
+                raise Exception(f"文件不完整: {size}/{expected_size} 字节")
+        except Exception as e:
+            partial_path.unlink(missing_ok=True)
+            print(f"下载视频 {video['id']} 失败: {str(e)}")
+            return None
+        
+        return self.cache.put(key, partial_path)
+    
+    def download_pexels_video(self, query, count=20, per_page=MAX_PER_PAGE):
+        """从Pexels下载count个4K视频，搜索结果不够时继续读取下一页"""
+        candidates = self.search.find_videos(query, count, per_page=per_page, min_width=3840, min_height=2160)
+        
+        # 多个片段同时下载，结果保持搜索结果的顺序
+        with ThreadPoolExecutor(max_workers=self.download_workers) as pool:
+            results = list(pool.map(lambda item: self.download_clip(*item), candidates))
+        # 缓存上限可能已调低，删除本次没有用到的旧片段
+        self.cache.evict()
         
-        return downloaded_files
+        return [path for path in results if path is not None]
     
     def download_background_music(self, duration=1800):
         """下载背景音乐"""
@@ -106,37 +197,249 @@ class VideoCreator:
         clip = clip.fx(vfx.lum_contrast, lum=1.1, contrast=1.1)  # 提高亮度和对比度
         return clip
     
-    def create_final_video(self, video_files, music_file, target_duration=1800):
-        """合成最终视频"""
-        # 加载视频片段
-        video_clips = []
+    def probe_video(self, video_file):
+        """读取视频的分辨率、帧率和时长，不解码画面"""
+        infos = ffmpeg_parse_infos(str(video_file))
+        return infos['video_size'], infos['video_fps'], infos['duration']
+    
+    def plan_timeline(self, video_files, target_duration=1800):
+        """挑选视频片段，确定每个片段截取的起始时间和时长"""
+        candidates = []
         for video_file in video_files:
-            clip = VideoFileClip(str(video_file))
+            (width, height), fps, duration = self.probe_video(video_file)
             # 检查视频质量
-            if clip.size[0] < 3840 or clip.size[1] < 2160:
+            if width < 3840 or height < 2160:
                 print(f"警告: 视频 {video_file} 分辨率低于4K，将被跳过")
                 continue
-            if clip.fps < 30:
+            if fps < 30:
                 print(f"警告: 视频 {video_file} 帧率过低，将被跳过")
                 continue
-            video_clips.append(clip)
+            candidates.append((video_file, duration))
         
-        if not video_clips:
+        if not candidates:
             raise Exception("没有找到足够高质量的视频片段")
         
         # 计算每个片段的时长
-        total_clips = len(video_clips)
-        clip_duration = target_duration / total_clips
+        clip_duration = target_duration / len(candidates)
+        
+        timeline = []
+        for video_file, duration in candidates:
+            if duration > clip_duration:
+                # 随机选择片段
+                start_time = random.uniform(0, duration - clip_duration)
+                timeline.append((video_file, start_time, clip_duration))
+            else:
+                timeline.append((video_file, 0, duration))
+        return timeline
+    
+    def save_timeline(self, timeline, music_file, path):
+        """保存片段选择和背景音乐，之后可以用其他编码配置渲染同样的内容"""
+        data = {
+            'music_file': str(music_file),
+            'clips': [{'path': str(video_file), 'start': start_time, 'duration': duration}
+                      for video_file, start_time, duration in timeline],
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    
+    def load_timeline(self, path):
+        """读取save_timeline保存的片段选择，返回(片段列表, 背景音乐)"""
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        timeline = [(Path(clip['path']), clip['start'], clip['duration']) for clip in data['clips']]
+        # 缓存中的片段可能已被删除
+        missing = [str(video_file) for video_file, _, _ in timeline if not video_file.exists()]
+        if missing:
+            raise Exception(f"片段文件不存在: {', '.join(missing)}")
+        return timeline, Path(data['music_file'])
+    
+    def create_final_video(self, video_files, music_file, target_duration=1800, engine='ffmpeg', segment_workers=None,
+                           profile=DEFAULT_PROFILE, timeline=None):
+        """
+        合成最终视频
+        :param engine: 'ffmpeg'在一个FFmpeg进程中完成裁剪、拼接、调色和编码；
+                       'segments'每个片段单独编码，多个FFmpeg进程同时运行，最后直接拼接；
+                       这两种方式失败时改用MoviePy。'moviepy'逐帧在Python中处理
+        :param segment_workers: 'segments'方式同时编码的片段数，默认为CPU核数
+        :param profile: 编码配置名称，见ENCODING_PROFILES
+        :param timeline: 已确定的片段选择（例如load_timeline读取的草稿），指定时不再重新挑选片段
+        """
+        if profile not in ENCODING_PROFILES:
+            raise ValueError(f"不支持的编码配置: {profile}，可选: {', '.join(ENCODING_PROFILES)}")
+        settings = ENCODING_PROFILES[profile]
+        
+        if timeline is None:
+            timeline = self.plan_timeline(video_files, target_duration)
+        # 保存本次的片段选择，草稿满意后可以用其他编码配置重新渲染
+        self.save_timeline(timeline, music_file, self.temp_dir / "timeline.json")
+        
+        name = "final_video.mp4" if profile == DEFAULT_PROFILE else f"final_video_{profile}.mp4"
+        output_path = self.output_dir / name
+        print(f"编码配置: {profile} ({settings['size'][0]}x{settings['size'][1]}, {settings['fps']}fps, "
+              f"{settings['preset']}, {settings['bitrate']})")
+        
+        if engine in ('ffmpeg', 'segments'):
+            try:
+                if engine == 'segments':
+                    return self.render_segments(timeline, music_file, output_path, settings, segment_workers)
+                return self.render_with_ffmpeg(timeline, music_file, output_path, settings)
+            except Exception as e:
+                print(f"FFmpeg渲染失败: {str(e)}，改用MoviePy渲染")
+        
+        return self.render_with_moviepy(timeline, music_file, output_path, settings)
+    
+    def clip_filter(self, index, settings):
+        """第index个输入片段统一分辨率、调色并转换帧率的滤镜，调色放在插帧之前以减少处理的帧数"""
+        width, height = settings['size']
+        return (f"[{index}:v]scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,{ENHANCE_FILTER},fps={settings['fps']}")
+    
+    def video_codec_args(self, settings):
+        """视频编码参数，同一次渲染的所有片段相同，分段编码的结果才能直接拼接"""
+        return ['-c:v', 'libx264', '-preset', settings['preset'], '-b:v', settings['bitrate'],
+                *settings['x264_params'], '-pix_fmt', 'yuv420p']
+    
+    def music_filter(self, input_index, duration):
+        """截取背景音乐并调整音量的滤镜"""
+        return f"[{input_index}:a]atrim=duration={duration:.3f},asetpts=PTS-STARTPTS,volume={MUSIC_VOLUME}[aout]"
+    
+    def ffmpeg_base_command(self):
+        """FFmpeg命令的公共部分，进度输出到标准输出"""
+        return [get_setting("FFMPEG_BINARY"), '-y', '-hide_banner', '-v', 'error', '-nostats', '-progress', 'pipe:1']
+    
+    def build_ffmpeg_command(self, timeline, music_file, output_path, settings):
+        """生成在一个FFmpeg进程中完成整个渲染的命令"""
+        total_duration = sum(duration for _, _, duration in timeline)
+        
+        command = self.ffmpeg_base_command()
+        # 在输入端截取片段，只解码需要的部分
+        for video_file, start_time, duration in timeline:
+            command += ['-ss', f'{start_time:.3f}', '-t', f'{duration:.3f}', '-i', str(video_file)]
+        # 循环播放音乐直到视频结束
+        command += ['-stream_loop', '-1', '-i', str(music_file)]
+        
+        filters = [f"{self.clip_filter(i, settings)}[v{i}]" for i in range(len(timeline))]
+        filters.append(''.join(f'[v{i}]' for i in range(len(timeline))) + f'concat=n={len(timeline)}:v=1:a=0[vout]')
+        filters.append(self.music_filter(len(timeline), total_duration))
+        
+        command += [
+            '-filter_complex', ';'.join(filters),
+            '-map', '[vout]', '-map', '[aout]',
+            *self.video_codec_args(settings),
+            '-c:a', 'aac',
+            '-t', f'{total_duration:.3f}',
+            '-f', 'mp4', str(output_path)
+        ]
+        return command, total_duration
+    
+    def run_ffmpeg(self, command, duration, log_path, label='渲染进度'):
+        """运行FFmpeg并显示进度，label为None时不显示，失败时抛出异常"""
+        with open(log_path, 'w', encoding='utf-8') as log:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=log, text=True)
+            last_percent = -1
+            for line in process.stdout:
+                key, _, value = line.strip().partition('=')
+                if label is not None and key == 'out_time_us' and value.isdigit() and duration > 0:
+                    percent = min(100, int(value) / 1e6 / duration * 100)
+                    if int(percent) != last_percent:
+                        last_percent = int(percent)
+                        print(f"\r{label}: {percent:.0f}%", end='', flush=True)
+            process.wait()
+        if label is not None:
+            print()
+        
+        if process.returncode != 0:
+            with open(log_path, encoding='utf-8', errors='replace') as log:
+                errors = log.read().strip().splitlines()
+            raise Exception(errors[-1] if errors else f"FFmpeg退出码 {process.returncode}")
+    
+    def render_with_ffmpeg(self, timeline, music_file, output_path, settings):
+        """用一个FFmpeg进程渲染最终视频，画面不经过Python"""
+        partial_path = self.temp_dir / f"{output_path.stem}.rendering.mp4"
+        command, duration = self.build_ffmpeg_command(timeline, music_file, partial_path, settings)
+        self.run_ffmpeg(command, duration, self.temp_dir / "ffmpeg_render.log")
+        os.replace(partial_path, output_path)
+        return output_path
+    
+    def build_segment_command(self, video_file, start_time, duration, output_path, threads, settings):
+        """生成单独编码一个片段的命令，片段只有画面；每次编码都从关键帧开始，且x264默认使用封闭GOP，片段可以独立解码"""
+        return self.ffmpeg_base_command() + [
+            '-ss', f'{start_time:.3f}', '-t', f'{duration:.3f}', '-i', str(video_file),
+            '-filter_complex', f"{self.clip_filter(0, settings)}[vout]",
+            '-map', '[vout]', '-an',
+            *self.video_codec_args(settings),
+            '-threads', str(threads),
+            '-t', f'{duration:.3f}',
+            '-f', 'mp4', str(output_path)
+        ]
+    
+    def render_segments(self, timeline, music_file, output_path, settings, workers=None):
+        """每个片段用一个FFmpeg进程单独编码，多个片段同时编码，再用concat直接拼接并加入背景音乐"""
+        cpu_count = os.cpu_count() or 1
+        workers = max(1, min(workers or cpu_count, len(timeline)))
+        # 每个进程分到的编码线程数，合计不超过CPU核数
+        threads = max(1, cpu_count // workers)
+        segments_dir = self.temp_dir / "segments"
+        segments_dir.mkdir(parents=True, exist_ok=True)
+        
+        def encode(item):
+            index, (video_file, start_time, duration) = item
+            segment_path = segments_dir / f"segment_{index:04d}.mp4"
+            command = self.build_segment_command(video_file, start_time, duration, segment_path, threads, settings)
+            self.run_ffmpeg(command, duration, segments_dir / f"segment_{index:04d}.log", label=None)
+            return segment_path
+        
+        print(f"分段编码 {len(timeline)} 个片段，同时编码 {workers} 个，每个使用 {threads} 个线程")
+        segment_paths = []
+        # FFmpeg在各自的进程中编码，线程池只负责启动进程和等待结果
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for segment_path in pool.map(encode, enumerate(timeline)):
+                segment_paths.append(segment_path)
+                print(f"\r片段编码: {len(segment_paths)}/{len(timeline)}", end='', flush=True)
+        print()
+        
+        list_path = segments_dir / "segments.txt"
+        with open(list_path, 'w', encoding='utf-8') as f:
+            for segment_path in segment_paths:
+                escaped = str(segment_path.resolve()).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        
+        total_duration = sum(duration for _, _, duration in timeline)
+        partial_path = self.temp_dir / f"{output_path.stem}.rendering.mp4"
+        command = self.ffmpeg_base_command() + [
+            '-f', 'concat', '-safe', '0', '-i', str(list_path),
+            '-stream_loop', '-1', '-i', str(music_file),
+            '-filter_complex', self.music_filter(1, total_duration),
+            '-map', '0:v', '-map', '[aout]',
+            '-c:v', 'copy',
+            '-c:a', 'aac',
+            '-t', f'{total_duration:.3f}',
+            '-f', 'mp4', str(partial_path)
+        ]
+        self.run_ffmpeg(command, total_duration, self.temp_dir / "ffmpeg_concat.log", label='拼接进度')
+        os.replace(partial_path, output_path)
+        
+        # 拼接完成后删除片段
+        for path in segments_dir.iterdir():
+            path.unlink()
+        return output_path
+    
+    def render_with_moviepy(self, timeline, music_file, output_path, settings):
+        """用MoviePy逐帧渲染最终视频"""
+        target_duration = sum(duration for _, _, duration in timeline)
+        # 加载视频片段
+        video_clips = [VideoFileClip(str(video_file)) for video_file, _, _ in timeline]
         
         # 调整每个片段的时长
         adjusted_clips = []
-        for clip in video_clips:
-            if clip.duration > clip_duration:
-                # 随机选择片段
-                start_time = random.uniform(0, clip.duration - clip_duration)
-                adjusted_clip = clip.subclip(start_time, start_time + clip_duration)
+        for clip, (_, start_time, duration) in zip(video_clips, timeline):
+            if start_time > 0 or duration < clip.duration:
+                adjusted_clip = clip.subclip(start_time, start_time + duration)
             else:
                 adjusted_clip = clip
+            # 缩放到编码配置的分辨率
+            if tuple(adjusted_clip.size) != settings['size']:
+                adjusted_clip = adjusted_clip.resize(newsize=settings['size'])
             # 增强视频质量
             adjusted_clip = self.enhance_video_quality(adjusted_clip)
             adjusted_clips.append(adjusted_clip)
@@ -153,40 +456,23 @@ class VideoCreator:
             audio = audio.loop(duration=target_duration)
         
         # 设置音频音量
-        audio = audio.volumex(0.3)  # 降低音量到30%
+        audio = audio.volumex(MUSIC_VOLUME)  # 降低音量到30%
         
         # 添加背景音乐
         final_video = final_video.set_audio(audio)
         
         # 导出最终视频
-        output_path = self.output_dir / "final_video.mp4"
         final_video.write_videofile(
             str(output_path),
             codec='libx264',
             audio_codec='aac',
             temp_audiofile=str(self.temp_dir / "temp-audio.m4a"),
             remove_temp=True,
-            fps=60,  # 提高帧率
-            preset='veryslow',  # 最慢但质量最好的编码预设
-            bitrate='50000k',  # 更高的比特率
+            fps=settings['fps'],
+            preset=settings['preset'],
+            bitrate=settings['bitrate'],
             threads=8,  # 增加线程数
-            ffmpeg_params=[
-                '-refs', '6',
-                '-me_method', 'umh',
-                '-subq', '8',
-                '-trellis', '2',
-                '-fast-pskip', '0',
-                '-8x8dct', '1',
-                '-weightb', '1',
-                '-g', '250',  # 关键帧间隔
-                '-sc_threshold', '40',  # 场景切换阈值
-                '-rc-lookahead', '60',
-                '-aq-mode', '3',
-                '-aq-strength', '0.8',
-                '-psy-rd', '1.0,0.0',
-                '-profile:v', 'high',
-                '-level', '5.2'
-            ]
+            ffmpeg_params=settings['x264_params']
         )
         
         # 清理临时文件
@@ -198,22 +484,50 @@ class VideoCreator:
         return output_path
 
 def main():
+    parser = argparse.ArgumentParser(
+        description='视频自动下载与合成工具',
+        epilog="1. 先渲染草稿检查片段: python video_creator.py --draft\n"
+               "2. 用草稿的片段渲染成片: python video_creator.py --timeline temp/timeline.json --profile archival",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--profile', choices=list(ENCODING_PROFILES), default=DEFAULT_PROFILE,
+                        help='编码配置：draft 低分辨率草稿；preview 720p快速预览；standard 4K兼顾速度；archival 4K最高质量')
+    parser.add_argument('--draft', action='store_true', help='渲染低分辨率草稿，等同于 --profile draft')
+    parser.add_argument('--engine', choices=['ffmpeg', 'segments', 'moviepy'], default='ffmpeg',
+                        help='ffmpeg: 一个FFmpeg进程渲染；segments: 分段同时编码后拼接；moviepy: 逐帧渲染')
+    parser.add_argument('--segment-workers', type=int, help='segments 方式同时编码的片段数，默认为 CPU 核数')
+    parser.add_argument('--duration', type=float, default=1800, help='视频时长（秒）')
+    parser.add_argument('--timeline', help='使用之前保存的片段选择（例如 temp/timeline.json），不再下载视频和背景音乐')
+    args = parser.parse_args()
+    profile = 'draft' if args.draft else args.profile
+    
     try:
         creator = VideoCreator()
         
-        # 下载视频
-        print("正在下载风景视频...")
-        video_files = creator.download_pexels_video("nature landscape", per_page=20)
-        
-        # 下载背景音乐
-        print("正在下载背景音乐...")
-        music_file = creator.download_background_music()
+        if args.timeline:
+            timeline, music_file = creator.load_timeline(args.timeline)
+            video_files = [video_file for video_file, _, _ in timeline]
+        else:
+            timeline = None
+            
+            # 下载视频
+            print("正在下载风景视频...")
+            video_files = creator.download_pexels_video("nature landscape", count=20)
+            
+            # 下载背景音乐
+            print("正在下载背景音乐...")
+            music_file = creator.download_background_music()
         
         # 合成最终视频
         print("正在合成最终视频...")
-        output_path = creator.create_final_video(video_files, music_file)
+        output_path = creator.create_final_video(
+            video_files, music_file, target_duration=args.duration, engine=args.engine,
+            segment_workers=args.segment_workers, profile=profile, timeline=timeline
+        )
         
         print(f"视频创建完成！保存在: {output_path}")
+        if profile != DEFAULT_PROFILE:
+            print(f"片段选择已保存在 {creator.temp_dir / 'timeline.json'}，可以用 --timeline 以其他编码配置重新渲染")
         
     except Exception as e:
         print(f"发生错误: {str(e)}")